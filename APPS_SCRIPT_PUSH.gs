@@ -68,10 +68,13 @@ function pushWeek(startDate, endDate, weekKey) {
     events: events
   };
   
+  // A full week compresses to a fraction of its JSON size; the webhook decodes gzip bodies
+  var body = Utilities.gzip(Utilities.newBlob(JSON.stringify(payload), 'application/json'));
   var options = {
     method: 'post',
     contentType: 'application/json',
-    payload: JSON.stringify(payload),
+    headers: {'Content-Encoding': 'gzip'},
+    payload: body.getBytes(),
     muteHttpExceptions: true
   };
   
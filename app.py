@@ -1,19 +1,43 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
 from datetime import datetime, date, timedelta
 import os
 import database as db
 import classifier
 import calendar_source
+import rules
+import title_model
+import progress_feed
+import llm_cache
+import sheet_sync
+import request_decoding
+import ingest
+import normalize
 
 app = Flask(__name__)
+# Ingest endpoints accept gzip/zstd request bodies, decoded as they are read
+app.wsgi_app = request_decoding.DecompressMiddleware(
+    app.wsgi_app, {"/api/sync", "/api/sync-classified", "/api/webhook"})
+app.wsgi_app = request_decoding.DecompressMiddleware(app.wsgi_app, {"/api/ingest"}, limit=ingest.INGEST_MAX_BYTES)
+
+# Classification jobs run in a worker thread here unless a separate worker process owns them
+if classifier.load_config()["classify_worker"] == "thread":
+    classifier.start_worker_thread()
 
 @app.after_request
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-API-Key'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Content-Encoding, X-API-Key'
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
     return response
 
+@app.errorhandler(413)
+def body_too_large(e):
+    return jsonify({"error": e.description}), 413
+
+@app.errorhandler(request_decoding.BodyDecodeError)
+def body_not_decodable(e):
+    return jsonify({"error": e.description}), 400
+
 import json
 
 # Load config: env vars override config.json
@@ -72,7 +96,7 @@ def week_display(week_key):
 def dashboard():
     wk = request.args.get("week", current_week_key())
     stats = db.get_agent_stats(wk)
-    progress = classifier.get_progress()
+    progress = classifier.get_progress(wk)
     return render_template("dashboard.html",
         stats=stats, week=wk, week_display=week_display(wk),
         prev_week=week_offset(wk, -1), next_week=week_offset(wk, 1),
@@ -106,12 +130,13 @@ def week_events(week_key):
         events=events, week=week_key, week_display=week_display(week_key),
         filter=filt, sales_count=len(sales), other_count=len(other), config=APP_CONFIG)
 
-def check_api_key():
-    """Verify sync API key if configured."""
+def check_api_key(read_body=True):
+    """Verify sync API key if configured. Streaming routes pass read_body=False so the body isn't consumed."""
     key = APP_CONFIG.get("sync_api_key", "")
     if not key:
         return True  # No key configured, allow (local dev)
-    provided = request.headers.get("X-API-Key", "") or (request.get_json(force=True, silent=True) or {}).get("api_key", "") or request.args.get("api_key", "")
+    body = (request.get_json(force=True, silent=True) or {}) if read_body else {}
+    provided = request.headers.get("X-API-Key", "") or body.get("api_key", "") or request.args.get("api_key", "")
     return provided == key
 
 @app.route("/api/sync", methods=["POST"])
@@ -124,94 +149,47 @@ def sync():
     # If browser sent events directly (client-side fetch from Apps Script)
     raw_events = data.get("events", None)
     if raw_events:
-        import hashlib
-        events = []
-        for ev in raw_events:
-            title = ev.get("title", "(No Title)")
-            agent = ev.get("agent", "Unknown")
-            start = ev.get("start", "")
-            event_id = hashlib.md5(f"{agent}_{start}_{title}".encode()).hexdigest()
-            events.append({
-                "id": event_id,
-                "agent_name": agent,
-                "title": title,
-                "start_time": start,
-                "end_time": ev.get("end", ""),
-                "description": ev.get("description", ""),
-                "location": ev.get("location", ""),
-                "week_key": wk,
-                "is_all_day": ev.get("allDay", False),
-                "status": ev.get("status", "confirmed")
-            })
-        db.upsert_events_bulk(events)
+        events = normalize.normalize_many(raw_events, week_key=wk, default_confidence=0.8)
+        upserted = db.upsert_events_bulk(events)
         
         # If events came with pre-classifications, apply them
         classified = 0
-        has_classifications = any(ev.get("classification") for ev in raw_events)
-        if has_classifications:
-            conn = db.get_db()
-            cur = conn.cursor()
-            ph = "%s" if db._is_pg() else "?"
-            for ev_raw, ev_db in zip(raw_events, events):
-                cls = ev_raw.get("classification", "")
-                if cls:
-                    cur.execute(f"UPDATE events SET classification={ph}, confidence={ph}, ai_reasoning={ph} WHERE id={ph} AND week_key={ph}",
-                        (cls, ev_raw.get("confidence", 0.8), ev_raw.get("reasoning", ""), ev_db["id"], wk))
-                    classified += 1
-            conn.commit()
-            conn.close()
+        results = [ev for ev in events if "classification" in ev]
+        if results:
+            db.update_classifications_bulk(results, week_key=wk)
+            classified = len(results)
         
-        return jsonify({"synced": len(events), "classified": classified, "week": wk})
+        return jsonify({"synced": len(events), "classified": classified, "week": wk, **upserted})
     
     # Fallback: try server-side fetch
     events = calendar_source.fetch_events(wk)
-    db.upsert_events_bulk(events)
-    return jsonify({"synced": len(events), "week": wk})
+    upserted = db.upsert_events_bulk(events)
+    return jsonify({"synced": len(events), "week": wk, **upserted})
 
 @app.route("/api/sync-redirect", methods=["POST"])
 def sync_redirect():
     """Receives form POST from Apps Script redirect with events JSON."""
-    import hashlib
     wk = request.form.get("week", current_week_key())
     events_json = request.form.get("events", "[]")
-    raw_events = json.loads(events_json)
-    
-    count = 0
-    for ev in raw_events:
-        title = ev.get("title", "(No Title)")
-        agent = ev.get("agent", "Unknown")
-        start = ev.get("start", "")
-        event_id = hashlib.md5(f"{agent}_{start}_{title}".encode()).hexdigest()
-        db.upsert_event({
-            "id": event_id,
-            "agent_name": agent,
-            "title": title,
-            "start_time": start,
-            "end_time": ev.get("end", ""),
-            "description": ev.get("description", ""),
-            "location": ev.get("location", ""),
-            "week_key": wk,
-            "is_all_day": ev.get("allDay", False),
-            "status": ev.get("status", "confirmed")
-        })
-        count += 1
+    events = normalize.normalize_many(json.loads(events_json), week_key=wk)
+    db.upsert_events_bulk(events)
     
-    return redirect(f"/?week={wk}&synced={count}")
+    return redirect(f"/?week={wk}&synced={len(events)}")
 
 @app.route("/api/status", methods=["GET"])
 def status():
     wk = request.args.get("week", current_week_key())
-    conn = db.get_db()
-    cur = conn.cursor()
-    ph = "%s" if db._is_pg() else "?"
-    cur.execute(f"SELECT COUNT(*) FROM events WHERE week_key={ph}", (wk,))
-    total = cur.fetchone()[0]
-    cur.execute(f"SELECT COUNT(*) FROM events WHERE week_key={ph} AND classification IS NOT NULL AND classification != ''", (wk,))
-    classified = cur.fetchone()[0]
-    cur.execute(f"SELECT COUNT(*) FROM events WHERE week_key={ph} AND classification='sales'", (wk,))
-    sales = cur.fetchone()[0]
-    conn.close()
-    return jsonify({"week": wk, "total": total, "classified": classified, "sales": sales, "unclassified": total - classified})
+    return jsonify({"week": wk, **db.get_week_status(wk)})
+
+@app.route("/api/db/pool", methods=["GET"])
+def db_pool_stats():
+    return jsonify(db.pool_stats())
+
+def queue_classification(wk, reclassify_all=False):
+    """Queue a week and drop its cached progress snapshot so watchers see the job right away."""
+    job, created = classifier.classify_events_async(wk, reclassify_all=reclassify_all)
+    progress_feed.invalidate(wk)
+    return job, created
 
 @app.route("/api/trigger-sync", methods=["POST"])
 def trigger_sync():
@@ -223,30 +201,55 @@ def trigger_sync():
     try:
         events = calendar_source.fetch_events(wk)
         if events:
-            db.upsert_events_bulk(events)
+            upserted = db.upsert_events_bulk(events)
             # Auto-classify new events
-            unclassified = db.get_unclassified_events(wk)
-            if unclassified:
-                classifier.classify_events_async(wk)
-            return jsonify({"status": "synced", "week": wk, "synced": len(events), "classifying": len(unclassified) if unclassified else 0})
+            pending = db.count_pending(wk)
+            if pending:
+                queue_classification(wk)
+            return jsonify({"status": "synced", "week": wk, "synced": len(events), "classifying": pending, **upserted})
         else:
             return jsonify({"status": "ok", "week": wk, "synced": 0, "message": "No events found. Auto-push runs every 15 min."})
     except Exception as e:
         return jsonify({"status": "ok", "week": wk, "synced": 0, "message": f"Sheet sync unavailable ({e}). Auto-push runs every 15 min."})
 
+@app.route("/api/sync-range", methods=["POST"])
+def sync_range():
+    """Sync weeks start..end from the sheet in one pass, then queue classification for them."""
+    if not check_api_key():
+        return jsonify({"error": "unauthorized"}), 401
+    data = request.get_json(force=True, silent=True) or {}
+    start = data.get("start", current_week_key())
+    try:
+        result = sheet_sync.sync_range(start, data.get("end", start), classify=data.get("classify", True),
+                                       queue=queue_classification)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"status": "synced", **result})
+
+@app.route("/api/ingest", methods=["POST"])
+def ingest_ndjson():
+    """Bulk load: NDJSON events for any number of weeks, streamed and committed in batches."""
+    if not check_api_key(read_body=False):
+        return jsonify({"error": "unauthorized"}), 401
+    summary = ingest.ingest_stream(request.stream)
+    summary["queued"] = []
+    if request.args.get("classify", "1") != "0":
+        for wk in summary["weeks"]:
+            if db.count_pending(wk):
+                queue_classification(wk)
+                summary["queued"].append(wk)
+    return jsonify(summary)
+
 @app.route("/api/classify", methods=["POST"])
 def classify():
     wk = (request.json or {}).get("week", current_week_key())
-    unclassified = db.get_unclassified_events(wk)
-    if not unclassified:
+    pending = db.count_pending(wk)
+    if not pending:
         return jsonify({"status": "done", "classified": 0, "remaining": 0})
     
-    # Start async classification
-    started = classifier.classify_events_async(wk)
-    if started:
-        return jsonify({"status": "started", "total": len(unclassified)})
-    else:
-        return jsonify({"status": "already_running", "progress": classifier.get_progress()})
+    # Queue the week; the job worker picks it up (other weeks queue behind it, never rejected)
+    job, created = queue_classification(wk)
+    return jsonify({"status": "queued", "created": created, "job_id": job["id"], "total": pending})
 
 @app.route("/api/reclassify", methods=["POST"])
 def reclassify_all():
@@ -254,19 +257,48 @@ def reclassify_all():
     events = db.get_events_for_week(wk)
     if not events:
         return jsonify({"status": "done", "classified": 0})
-    started = classifier.classify_events_async(wk, reclassify_all=True)
-    if started:
-        return jsonify({"status": "started", "total": len(events)})
-    else:
-        return jsonify({"status": "already_running", "progress": classifier.get_progress()})
+    job, created = queue_classification(wk, reclassify_all=True)
+    return jsonify({"status": "queued", "created": created, "job_id": job["id"], "total": len(events)})
 
 @app.route("/api/classify/progress", methods=["GET"])
 def classify_progress():
-    progress = classifier.get_progress()
     wk = request.args.get("week", current_week_key())
-    remaining = len(db.get_unclassified_events(wk))
-    progress["remaining"] = remaining
-    return jsonify(progress)
+    return jsonify(progress_feed.snapshot(wk))
+
+@app.route("/api/classify/stream", methods=["GET"])
+def classify_stream():
+    """Server-sent events: the week's progress snapshot, then only the fields that change.
+
+    Past MAX_STREAMS open streams the client gets a 503 and falls back to polling.
+    """
+    wk = request.args.get("week", current_week_key())
+    if not progress_feed.open_stream():
+        return jsonify({"error": "too many streams", "poll": "/api/classify/progress"}), 503
+
+    def events():
+        yield "retry: 3000\n\n"
+        for delta in progress_feed.stream(wk):
+            if delta is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(delta)}\n\n"
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Runs when the server is done with the response, whether or not the generator ever started
+    response.call_on_close(progress_feed.close_stream)
+    return response
+
+@app.route("/api/classify/jobs", methods=["GET"])
+def classify_jobs():
+    limit = min(int(request.args.get("limit", 20)), 200)
+    return jsonify({"jobs": db.list_classification_jobs(limit)})
+
+@app.route("/api/classify/stats", methods=["GET"])
+def classify_stats():
+    return jsonify({"title_cache": classifier.cache_stats(), "rules": rules.rule_stats(),
+                    "local_model": title_model.model_info(), "progress_feed": progress_feed.feed_stats(),
+                    "llm_cache": llm_cache.cache_stats()})
 
 @app.route("/api/sync-classified", methods=["POST"])
 def sync_classified():
@@ -279,49 +311,21 @@ def sync_classified():
     if not raw_events:
         return jsonify({"error": "no events"}), 400
     
-    import hashlib
-    events = []
-    for ev in raw_events:
-        title = ev.get("title", "(No Title)")
-        agent = ev.get("agent", "Unknown")
-        start = ev.get("start", "")
-        event_id = hashlib.md5(f"{agent}_{start}_{title}".encode()).hexdigest()
-        events.append({
-            "id": event_id,
-            "agent_name": agent,
-            "title": title,
-            "start_time": start,
-            "end_time": ev.get("end", ""),
-            "description": ev.get("description", ""),
-            "location": ev.get("location", ""),
-            "week_key": wk,
-            "is_all_day": ev.get("allDay", False),
-            "status": ev.get("status", "confirmed"),
-            "classification": ev.get("classification", ""),
-            "confidence": ev.get("confidence", 0),
-            "ai_reasoning": ev.get("reasoning", "")
-        })
-    db.upsert_events_bulk(events)
+    events = normalize.normalize_many(raw_events, week_key=wk, default_confidence=0)
+    upserted = db.upsert_events_bulk(events)
     
     # Now update classifications directly
-    conn = db.get_db()
-    cur = conn.cursor()
-    ph = "%s" if db._is_pg() else "?"
-    updated = 0
-    for ev in events:
-        if ev["classification"]:
-            cur.execute(f"UPDATE events SET classification={ph}, confidence={ph}, ai_reasoning={ph} WHERE id={ph} AND week_key={ph}",
-                (ev["classification"], ev["confidence"], ev["ai_reasoning"], ev["id"], wk))
-            updated += 1
-    conn.commit()
-    conn.close()
-    return jsonify({"synced": len(events), "classified": updated, "week": wk})
+    classified = [ev for ev in events if "classification" in ev]
+    db.update_classifications_bulk(classified, week_key=wk)
+    updated = len(classified)
+    return jsonify({"synced": len(events), "classified": updated, "week": wk, **upserted})
 
 @app.route("/api/webhook", methods=["POST"])
 def webhook_receive():
     """Receive pushed events from Apps Script (Option A: push architecture).
-    Apps Script calls this on a timer. Only inserts NEW events to stay fast."""
-    import hashlib
+    Apps Script calls this on a timer with the full week. Only new or edited events
+    are written, and timed events missing from the push are tombstoned. Send
+    "full_week": false for partial pushes that must not delete anything."""
     data = request.get_json(force=True, silent=True) or {}
     
     # Auth: check webhook secret
@@ -340,57 +344,34 @@ def webhook_receive():
     # Map calendar IDs to agent names
     agents_map = {a["calendar_id"]: a["name"] for a in APP_CONFIG.get("agents", [])}
     
-    # Build incoming events
-    incoming = []
-    for ev in raw_events:
-        if ev.get("allDay"):
-            continue
-        title = ev.get("title", "(No Title)")
-        agent = ev.get("agent", "Unknown")
-        if "@" in agent:
-            agent = agents_map.get(agent, agent)
-        start = ev.get("start", "")
-        event_id = hashlib.md5(f"{agent}_{start}_{title}".encode()).hexdigest()
-        incoming.append({
-            "id": event_id,
-            "agent_name": agent,
-            "title": title,
-            "start_time": start,
-            "end_time": ev.get("end", ""),
-            "description": ev.get("description", ""),
-            "location": ev.get("location", ""),
-            "week_key": wk,
-        })
+    # Build incoming events (all-day entries aren't tracked here, so the diff leaves stored ones alone)
+    incoming = normalize.normalize_many(raw_events, week_key=wk, agents=agents_map, skip_all_day=True)
     
     if not incoming:
         return jsonify({"ok": True, "synced": 0, "skipped": len(raw_events), "week": wk, "new": 0})
     
-    # Get existing event IDs for this week to skip duplicates
-    existing_ids = db.get_event_ids_for_week(wk)
-    
-    new_events = [e for e in incoming if e["id"] not in existing_ids]
-    skipped = len(incoming) - len(new_events)
-    
-    if new_events:
-        db.upsert_events_bulk(new_events)
+    # Set-diff against the stored week: insert new, rewrite changed, tombstone missing
+    full_week = bool(data.get("full_week", True))
+    diff = db.apply_week_snapshot(wk, incoming, full_week=full_week, with_all_day=False)
     
     # Auto-classify only if we got new events
     auto_classified = 0
-    if new_events:
-        unclassified = db.get_unclassified_events(wk)
-        if unclassified:
+    if diff["inserted"]:
+        pending = db.count_pending(wk)
+        if pending:
             try:
-                classifier.classify_events_async(wk)
-                auto_classified = len(unclassified)
+                queue_classification(wk)
+                auto_classified = pending
             except Exception as e:
                 print(f"[webhook] Auto-classify error: {e}", flush=True)
     
     return jsonify({
         "ok": True,
-        "synced": len(new_events),
-        "skipped": skipped,
+        "synced": diff["inserted"] + diff["updated"],
+        "skipped": diff["unchanged"],
         "week": wk,
-        "auto_classifying": auto_classified
+        "auto_classifying": auto_classified,
+        **diff
     })
 
 
@@ -398,6 +379,8 @@ def webhook_receive():
 def override():
     data = request.json
     db.set_override(data["event_id"], data["classification"])
+    rules.invalidate()
+    classifier.invalidate_prompt()
     return jsonify({"ok": True})
 
 if __name__ == "__main__":
@@ -0,0 +1,263 @@
+"""Backfill weeks from events_cache (see event_cache.py) into the deployed app.
+
+    python backfill_engine.py 2026-W01 [2026-W10] [--jobs 4] [--push-workers 4] [--chunk 500]
+                              [--no-classify] [--restart] [--api URL] [--manifest PATH]
+
+Each week runs as a pipeline: load cache -> normalize -> push -> classify ->
+verify. Weeks run in parallel on a bounded pool; their chunk pushes share a
+second pool and one keep-alive HTTP session, and are sent gzip-compressed.
+Failed requests are retried with jittered exponential backoff (Retry-After is
+honoured). Progress is written to a checkpoint manifest after every chunk, so
+an interrupted run resumes where it stopped: finished weeks are skipped and
+pushed chunks are not sent again. A week whose cached content changed (its
+manifest sha256) starts over.
+
+Replaces the one-off push scripts (backfill.py, push_cached.py, process_all.py, ...).
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from calendar_source import week_range
+import event_cache
+
+DEFAULT_API = "https://krs-calendar-tracker.onrender.com"
+CACHE_DIR = event_cache.CACHE_DIR
+MANIFEST_VERSION = 1
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+POLL_SECONDS = 5
+CLASSIFY_TIMEOUT = 3600
+
+def _config():
+    path = os.path.join(os.path.dirname(__file__), "config.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def sync_api_key():
+    """The app's API key: SYNC_API_KEY, else sync_api_key from config.json."""
+    return os.environ.get("SYNC_API_KEY", _config().get("sync_api_key", ""))
+
+def _backoff(attempt, retry_after=None):
+    """Seconds to wait before the next attempt: Retry-After if given, else capped exponential with jitter."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except ValueError:
+            pass
+    return min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+class Client:
+    """The app's API over one keep-alive session, with retries."""
+
+    def __init__(self, api, key, pool_size):
+        self.api = api.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if key:
+            self.session.headers["X-API-Key"] = key
+        self.stats = {"requests": 0, "retries": 0}
+        self._lock = threading.Lock()
+
+    def call(self, method, path, timeout=120, attempts=MAX_ATTEMPTS, **kwargs):
+        """JSON response of a request, retried on connection errors and 429/5xx."""
+        for attempt in range(attempts):
+            with self._lock:
+                self.stats["requests"] += 1
+            retry_after = None
+            try:
+                r = self.session.request(method, f"{self.api}{path}", timeout=timeout, **kwargs)
+                if r.status_code < 400:
+                    return r.json()
+                if r.status_code not in RETRY_STATUSES:
+                    raise RuntimeError(f"{method} {path}: HTTP {r.status_code} {r.text[:200]}")
+                retry_after = r.headers.get("Retry-After")
+                problem = f"HTTP {r.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                problem = type(e).__name__
+            if attempt + 1 == attempts:
+                break
+            delay = _backoff(attempt, retry_after)
+            with self._lock:
+                self.stats["retries"] += 1
+            print(f"[backfill] {method} {path}: {problem}, retry {attempt + 1} in {delay:.1f}s", flush=True)
+            time.sleep(delay)
+        raise RuntimeError(f"{method} {path}: gave up after {attempts} attempts ({problem})")
+
+class Manifest:
+    """Per-week checkpoint state, rewritten atomically on every change."""
+
+    def __init__(self, path, restart=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {"version": MANIFEST_VERSION, "weeks": {}}
+        if not restart and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.data = data
+
+    def week(self, wk):
+        with self.lock:
+            return dict(self.data["weeks"].get(wk, {}))
+
+    def update(self, wk, **fields):
+        with self.lock:
+            entry = self.data["weeks"].setdefault(wk, {})
+            entry.update(fields, updated_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.data, f, indent=1)
+            os.replace(tmp, self.path)
+
+    def chunk_done(self, wk, index):
+        with self.lock:
+            done = self.data["weeks"][wk].setdefault("chunks_done", [])
+            done.append(index)
+        self.update(wk)
+
+def _identity(event):
+    return (event["agent"], event["title"], event["start"])
+
+class Engine:
+    def __init__(self, client, manifest, jobs=4, push_workers=4, chunk=500, classify=True, cache_dir=CACHE_DIR):
+        self.client = client
+        self.manifest = manifest
+        self.jobs = jobs
+        self.chunk = chunk
+        self.classify = classify
+        self.cache_dir = cache_dir
+        self.push_pool = ThreadPoolExecutor(push_workers, thread_name_prefix="push")
+
+    def wake(self):
+        """Render spins the app down when idle; the first request can take a minute."""
+        self.client.call("GET", "/api/status", timeout=180, attempts=10)
+
+    def run(self, weeks):
+        self.wake()
+        with ThreadPoolExecutor(self.jobs, thread_name_prefix="week") as pool:
+            results = dict(zip(weeks, pool.map(self.run_week, weeks)))
+        self.push_pool.shutdown()
+        return results
+
+    def run_week(self, wk):
+        t0 = time.perf_counter()
+        try:
+            info = event_cache.week_info(wk, self.cache_dir)
+            if info is None:
+                print(f"[backfill] {wk}: no cache file, skipping", flush=True)
+                return {"stage": "missing"}
+            fingerprint = info["sha256"]
+            state = self.manifest.week(wk)
+            if state.get("source") != fingerprint or state.get("chunk") != self.chunk:
+                if state:
+                    print(f"[backfill] {wk}: cache file changed since the last run, starting over", flush=True)
+                state = {"source": fingerprint, "chunk": self.chunk, "chunks_done": [], "stage": "loaded"}
+                self.manifest.update(wk, **state, error=None)
+            if state["stage"] == "verified":
+                print(f"[backfill] {wk}: already verified, skipping", flush=True)
+                return state
+
+            events = event_cache.load_week(wk, self.cache_dir)
+            expected = len({_identity(e) for e in events})
+            if state["stage"] in ("loaded", "pushing"):
+                self.push(wk, events, set(state.get("chunks_done", [])))
+                self.manifest.update(wk, stage="pushed", events=len(events))
+            if self.classify and self.manifest.week(wk)["stage"] == "pushed":
+                self.wait_for_classification(wk)
+                self.manifest.update(wk, stage="classified")
+            status = self.client.call("GET", f"/api/status?week={wk}")
+            ok = status.get("total", 0) >= expected and (not self.classify or status.get("unclassified", 0) == 0)
+            self.manifest.update(wk, stage="verified" if ok else self.manifest.week(wk)["stage"], status=status,
+                                 expected=expected, error=None if ok else "verification failed")
+            print(f"[backfill] {wk}: {'verified' if ok else 'NOT verified'} - {status.get('total')} events "
+                  f"(expected {expected}), {status.get('sales')} sales, {status.get('unclassified')} unclassified "
+                  f"in {time.perf_counter() - t0:.1f}s", flush=True)
+            return self.manifest.week(wk)
+        except Exception as e:
+            print(f"[backfill] {wk}: failed: {e}", flush=True)
+            self.manifest.update(wk, error=str(e))
+            return self.manifest.week(wk)
+
+    def push(self, wk, events, done):
+        chunks = [(i // self.chunk, events[i:i + self.chunk]) for i in range(0, len(events), self.chunk)]
+        todo = [(n, c) for n, c in chunks if n not in done]
+        print(f"[backfill] {wk}: {len(events)} events, pushing {len(todo)}/{len(chunks)} chunks", flush=True)
+        self.manifest.update(wk, stage="pushing")
+
+        def send(item):
+            n, chunk = item
+            body = gzip.compress(json.dumps({"week": wk, "events": chunk}).encode(), compresslevel=6)
+            self.client.call("POST", "/api/sync", data=body,
+                             headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+            self.manifest.chunk_done(wk, n)
+
+        # list() re-raises the first failed chunk; the others stay recorded for the next run
+        list(self.push_pool.map(send, todo))
+
+    def wait_for_classification(self, wk):
+        job = self.client.call("POST", "/api/classify", json={"week": wk})
+        print(f"[backfill] {wk}: classification {job.get('status', '?')} (job {job.get('job_id')})", flush=True)
+        deadline = time.monotonic() + CLASSIFY_TIMEOUT
+        last = None
+        while time.monotonic() < deadline:
+            progress = self.client.call("GET", f"/api/classify/progress?week={wk}")
+            if not progress.get("running"):
+                if progress.get("status") == "failed":
+                    raise RuntimeError(f"classification failed: {progress.get('current')}")
+                return progress
+            if (progress.get("done"), progress.get("total")) != last:
+                last = (progress.get("done"), progress.get("total"))
+                print(f"[backfill] {wk}: classifying {last[0]}/{last[1]}", flush=True)
+            time.sleep(POLL_SECONDS)
+        raise RuntimeError(f"classification still running after {CLASSIFY_TIMEOUT}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("start")
+    parser.add_argument("end", nargs="?")
+    parser.add_argument("--jobs", type=int, default=4, help="weeks in flight at once")
+    parser.add_argument("--push-workers", type=int, default=4, help="concurrent /api/sync requests across all weeks")
+    parser.add_argument("--chunk", type=int, default=500, help="events per /api/sync request")
+    parser.add_argument("--no-classify", action="store_true")
+    parser.add_argument("--restart", action="store_true", help="ignore the manifest and push everything again")
+    parser.add_argument("--api", default=os.environ.get("BACKFILL_API_URL", DEFAULT_API))
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--manifest")
+    args = parser.parse_args()
+
+    key = sync_api_key()
+    weeks = week_range(args.start, args.end)
+    client = Client(args.api, key, pool_size=args.jobs + args.push_workers)
+    manifest = Manifest(args.manifest or os.path.join(args.cache_dir, "backfill_manifest.json"), restart=args.restart)
+    engine = Engine(client, manifest, jobs=args.jobs, push_workers=args.push_workers, chunk=args.chunk,
+                    classify=not args.no_classify, cache_dir=args.cache_dir)
+    t0 = time.perf_counter()
+    results = engine.run(weeks)
+    verified = [wk for wk, r in results.items() if r.get("stage") == "verified"]
+    print(f"[backfill] {len(verified)}/{len(weeks)} weeks verified in {time.perf_counter() - t0:.1f}s "
+          f"({client.stats['requests']} requests, {client.stats['retries']} retries)", flush=True)
+    for wk, r in results.items():
+        if r.get("stage") != "verified":
+            print(f"  {wk}: {r.get('stage')} {r.get('error') or ''}", flush=True)
+    sys.exit(0 if len(verified) == len(weeks) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Backfill W01-W07 using Playwright to connect to the OpenClaw browser."""
-import json, requests, time, asyncio, os, sys
+import json, requests, time, asyncio, sys
+import event_cache
 
 API = 'https://krs-calendar-tracker.onrender.com'
 KEY = 'krs-sync-2026-x7qm9p'
@@ -43,13 +44,9 @@ async def fetch_and_push():
         page = await context.new_page()
         
         for wk, start, end in WEEKS:
-            cache = f'events_cache/{wk}.json'
-            if os.path.exists(cache) and os.path.getsize(cache) > 1000:
+            if event_cache.has_week(wk, min_events=2):
                 print(f'{wk}: using cache', flush=True)
-                with open(cache) as f:
-                    events = json.load(f)
-                    if isinstance(events, dict):
-                        events = events.get('events', [])
+                events = event_cache.load_week(wk)
             else:
                 url = f'{SCRIPT}?start={start}&end={end}'
                 print(f'{wk}: fetching from Apps Script...', flush=True)
@@ -64,11 +61,8 @@ async def fetch_and_push():
                     print(f'  {wk}: JSON parse failed, text={text[:100]}', flush=True)
                     continue
                 
-                # Save compact
-                compact = [{'a': e.get('agent',''), 't': e.get('title',''), 's': e.get('start',''), 'n': e.get('end',''), 'd': (e.get('description','') or '')[:100], 'l': (e.get('location','') or '')[:100]} for e in events]
-                with open(cache, 'w') as f:
-                    json.dump(compact, f)
-                events = compact
+                event_cache.write_week(wk, events)
+                events = event_cache.load_week(wk)
             
             print(f'  {wk}: {len(events)} events, pushing...', flush=True)
             synced = push_week(wk, events)
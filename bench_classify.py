@@ -0,0 +1,308 @@
+"""Classifier benchmarks against mock_openai.
+
+Usage: python bench_classify.py [batches] [concurrency] [latency_seconds]
+       python bench_classify.py start [calls] [overrides]
+       python bench_classify.py sweep [--sizes 10,20,50,100,auto] [--concurrency 1,4,8] [--backends llm,rules,local]
+                                      [--latency S] [--jitter S] [--error-rate P] [--rate-limit-rate P]
+                                      [--mock-accuracy P] [--limit N] [--synthetic N] [--holdout F] [--live] [--json PATH]
+
+Sends synthetic batches through classifier.classify_batches_async (no database
+writes) and fails unless the mock saw `concurrency` requests in flight at once
+and the run finished in roughly ceil(batches / concurrency) round trips.
+
+`start` measures per-batch start latency instead: one-event batches sent one at
+a time through classify_batch_openai (as classify_worker.py does) against a
+zero-latency mock, with `overrides` manager corrections in the database.
+
+`sweep` is the tuning harness. It builds a labelled corpus from the configured
+database and classifies it once per backend x batch size x concurrency level.
+The gold label comes from a manager override (on the event or in the overrides
+table), else the stored classification; --synthetic uses generated titles
+instead. Backends:
+    llm    everything goes to the model
+    rules  rules.py decides what it can, the rest goes to the model
+    local  the trained title model decides what it is confident about, the rest goes to the model
+The mock answers each title with its gold label, flipped with probability
+1 - mock_accuracy, so batching bugs (dropped or misaligned ids) show up as lost
+accuracy. --live sends to the configured OpenAI endpoint instead, which is the
+only way to measure how batch size changes the real model's answers. Nothing is
+written to the database, and llm_cache is off so every run makes its requests.
+Use --holdout 0.2 with the local backend to score only titles the model was not trained on.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ["LLM_CACHE_MODE"] = "off"
+
+from mock_openai import start_mock_server
+
+BATCH_EVENTS = 20
+SYNTHETIC_TITLES = [
+    ("Medicare review - {name}", "sales"), ("Annuity consult {name}", "sales"), ("Policy appt w/ {name}", "sales"),
+    ("Enrollment - {name}", "sales"), ("Follow up call {name}", "sales"), ("{name} - kitchen table", "sales"),
+    ("Team Meeting", "not_sales"), ("Lunch", "not_sales"), ("Prospecting block", "not_sales"),
+    ("Dentist", "not_sales"), ("Training: {name} product", "not_sales"), ("Office hours", "not_sales"),
+]
+NAMES = ["Smith", "Garcia", "Nguyen", "Johnson", "Patel", "Brown", "Lee", "Martinez", "Davis", "Kim"]
+
+def _scratch_db():
+    if not os.environ.get("DATABASE_URL"):
+        os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+def make_batches(n_batches, size):
+    titles = ["Medicare review - Smith", "Team Meeting", "Annuity consult", "Lunch", "Prospecting block"]
+    return [[{"id": f"b{b}-{i}", "title": f"{titles[i % len(titles)]} {b}-{i}", "agent_name": f"Agent {i % 17}"}
+             for i in range(size)] for b in range(n_batches)]
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def bench_start(calls, overrides):
+    _scratch_db()
+    server, base_url, state = start_mock_server(latency=0.0)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    import database as db
+    import classifier
+
+    db.upsert_events_bulk([{"id": f"start-{i}", "agent_name": "Agent 1", "title": f"Zq review {i}",
+                            "start_time": f"2026-01-01T{i:05d}", "week_key": "bench"} for i in range(overrides)])
+    for i in range(overrides):
+        db.set_override(f"start-{i}", "sales")
+
+    timings = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        classifier.classify_batch_openai([{"id": f"none-{i}", "title": f"Xyzzy {i}", "agent_name": "Agent 1"}])
+        timings.append((time.perf_counter() - t0) * 1000)
+    server.shutdown()
+    print(f"{calls} one-event batches, {overrides} overrides, mock latency 0", flush=True)
+    print(f"  per batch:  mean {sum(timings) / len(timings):.2f} ms  p50 {percentile(timings, 50):.2f} ms"
+          f"  p95 {percentile(timings, 95):.2f} ms", flush=True)
+    print(f"  requests:   {state.stats['requests']}", flush=True)
+
+def load_corpus(limit=None, holdout=0.0):
+    """Labelled events from the database as dicts with id, title, agent_name, gold, source and stored."""
+    import database as db
+    import title_model
+    corrections = dict(db.get_override_labels())
+    corpus = []
+    for row in db.get_labelled_titles():
+        stored = row["classification"] if row["classification"] in ("sales", "not_sales") else None
+        if row["override"] in ("sales", "not_sales"):
+            gold, source = row["override"], "override"
+        elif corrections.get(row["title"]) in ("sales", "not_sales"):
+            gold, source = corrections[row["title"]], "override"
+        elif stored:
+            gold, source = stored, "stored"
+        else:
+            continue
+        if holdout and not title_model._is_holdout(row["title"], holdout):
+            continue
+        corpus.append({"id": row["id"], "title": row["title"], "agent_name": row["agent_name"] or "",
+                       "gold": gold, "source": source, "stored": stored})
+    corpus.sort(key=lambda e: e["id"])
+    return corpus[:limit] if limit else corpus
+
+def synthetic_corpus(n, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n):
+        template, gold = rng.choice(SYNTHETIC_TITLES)
+        corpus.append({"id": f"syn-{i}", "title": template.format(name=rng.choice(NAMES)),
+                       "agent_name": f"Agent {i % 17}", "gold": gold, "source": "synthetic", "stored": None})
+    return corpus
+
+def mock_labels(corpus, accuracy, seed=11):
+    """Title -> label the mock will answer: the gold label, flipped with probability 1 - accuracy."""
+    rng = random.Random(seed)
+    flip = {"sales": "not_sales", "not_sales": "sales"}
+    return {e["title"]: e["gold"] if rng.random() < accuracy else flip[e["gold"]] for e in corpus}
+
+def decide_locally(backend, events):
+    """(results, events left for the model) for a backend, without touching the database."""
+    if backend == "rules":
+        import rules
+        return rules.apply_rules(events)
+    if backend == "local":
+        import classifier
+        import title_model
+        model = title_model.load()
+        if model is None:
+            raise ValueError("no trained title model (python title_model.py train)")
+        return title_model.classify(model, events, classifier.load_config()["local_model_threshold"])
+    if backend != "llm":
+        raise ValueError(f"unknown backend {backend!r}")
+    return [], events
+
+def run_once(corpus, backend, size, concurrency, state):
+    """Classify the corpus once. Returns a metrics dict."""
+    import classifier
+    events = [{k: e[k] for k in ("id", "title", "agent_name")} for e in corpus]
+    latencies = []
+    request_batch = classifier._request_batch
+
+    async def timed(*args):
+        t0 = time.perf_counter()
+        try:
+            return await request_batch(*args)
+        finally:
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    if state:
+        state.reset()
+    classifier._request_batch = timed
+    try:
+        t0 = time.perf_counter()
+        results, remaining = decide_locally(backend, events)
+        if size == "auto":
+            batches = classifier._batches(remaining)
+        else:
+            batches = [remaining[i:i + size] for i in range(0, len(remaining), size)]
+        est_tokens = sum(classifier._estimate_tokens(classifier.get_system_prompt(), classifier._encode_batch(b), len(b))
+                         for b in batches)
+        results = results + asyncio.run(classifier.classify_batches_async(batches, concurrency=concurrency, save=False))
+        elapsed = time.perf_counter() - t0
+    finally:
+        classifier._request_batch = request_batch
+
+    answers = {r["id"]: str(r.get("classification", "")).lower() for r in results}
+    scored = [(e, answers.get(e["id"])) for e in corpus]
+
+    def rate(pairs):
+        pairs = list(pairs)
+        return round(sum(1 for want, got in pairs if want == got) / len(pairs), 4) if pairs else None
+
+    stats = state.stats if state else {}
+    return {
+        "backend": backend, "batch_size": size, "concurrency": concurrency, "events": len(corpus),
+        "decided_locally": len(events) - len(remaining), "requests": len(batches),
+        "answered": sum(1 for _, got in scored if got), "seconds": round(elapsed, 3),
+        "events_per_sec": round(len(corpus) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "prompt_tokens": stats.get("prompt_tokens", est_tokens), "completion_tokens": stats.get("completion_tokens"),
+        "rate_limited": stats.get("rate_limited"), "errors": stats.get("errors"),
+        "accuracy": rate((e["gold"], got) for e, got in scored),
+        "override_accuracy": rate((e["gold"], got) for e, got in scored if e["source"] == "override"),
+        "agreement": rate((e["stored"], got) for e, got in scored if e["stored"]),
+    }
+
+# (heading, row key, width, format spec); None prints as "-"
+COLUMNS = [("backend", "backend", 7, ""), ("size", "batch_size", 5, ""), ("conc", "concurrency", 4, ""),
+           ("reqs", "requests", 5, ""), ("ev/s", "events_per_sec", 8, ",.0f"), ("p50ms", "p50_ms", 7, ".0f"),
+           ("p95ms", "p95_ms", 7, ".0f"), ("prompt", "prompt_tokens", 8, ","), ("compl", "completion_tokens", 7, ","),
+           ("429", "rate_limited", 4, ""), ("5xx", "errors", 4, ""), ("answered", "answered", 8, ""),
+           ("acc", "accuracy", 6, ".3f"), ("ovr_acc", "override_accuracy", 7, ".3f"), ("agree", "agreement", 6, ".3f")]
+
+def format_row(row):
+    cells = []
+    for _, key, width, spec in COLUMNS:
+        value = row[key]
+        cells.append(format("-" if value is None else format(value, spec), f">{width}"))
+    return " ".join(cells)
+
+def sweep(argv):
+    parser = argparse.ArgumentParser(prog="bench_classify.py sweep", description="Classifier tuning sweep")
+    parser.add_argument("--sizes", default="10,20,50,100,auto")
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--backends", default="llm,rules")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--mock-accuracy", type=float, default=0.95)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--synthetic", type=int, default=0, help="use N generated titles instead of the database")
+    parser.add_argument("--holdout", type=float, default=0.0)
+    parser.add_argument("--live", action="store_true", help="send to the configured OpenAI endpoint, not the mock")
+    parser.add_argument("--json", help="also write the rows to this file")
+    args = parser.parse_args(argv)
+
+    corpus = synthetic_corpus(args.synthetic) if args.synthetic else load_corpus(args.limit, args.holdout)
+    if not corpus:
+        print("[bench] No labelled events in the database; using --synthetic 1000", flush=True)
+        corpus = synthetic_corpus(1000)
+    sources = {}
+    for e in corpus:
+        sources[e["source"]] = sources.get(e["source"], 0) + 1
+    print(f"[bench] Corpus: {len(corpus)} events {sources}", flush=True)
+
+    server = state = None
+    if not args.live:
+        server, base_url, state = start_mock_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                                    rate_limit_rate=args.rate_limit_rate, seed=1,
+                                                    labels=mock_labels(corpus, args.mock_accuracy))
+        os.environ["OPENAI_BASE_URL"] = base_url
+        os.environ["OPENAI_API_KEY"] = "mock"
+
+    sizes = [s if s == "auto" else int(s) for s in args.sizes.split(",")]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    rows = []
+    print(" ".join(format(title, f">{width}") for title, _, width, _ in COLUMNS), flush=True)
+    for backend in args.backends.split(","):
+        try:
+            decide_locally(backend, [])
+        except ValueError as e:
+            print(f"[bench] Skipping {backend}: {e}", flush=True)
+            continue
+        for size in sizes:
+            for concurrency in levels:
+                row = run_once(corpus, backend, size, concurrency, state)
+                rows.append(row)
+                print(format_row(row), flush=True)
+    if server:
+        server.shutdown()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"corpus": len(corpus), "args": vars(args), "rows": rows}, f, indent=2)
+        print(f"[bench] Wrote {args.json}", flush=True)
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "start":
+        calls = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        overrides = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        return bench_start(calls, overrides)
+    if len(sys.argv) > 1 and sys.argv[1] == "sweep":
+        return sweep(sys.argv[2:])
+    _scratch_db()
+    n_batches = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+
+    server, base_url, state = start_mock_server(latency=latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    import classifier
+
+    batches = make_batches(n_batches, BATCH_EVENTS)
+    t0 = time.perf_counter()
+    results = asyncio.run(classifier.classify_batches_async(batches, concurrency=concurrency, save=False))
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+
+    events = sum(len(b) for b in batches)
+    serial = n_batches * latency
+    expected = math.ceil(n_batches / concurrency) * latency
+    print(f"{n_batches} batches x {BATCH_EVENTS} events, concurrency={concurrency}, latency={latency}s", flush=True)
+    print(f"  results:        {len(results)}/{events}", flush=True)
+    print(f"  wall time:      {elapsed:.2f}s (serial would be {serial:.2f}s, ideal {expected:.2f}s)", flush=True)
+    print(f"  events/sec:     {events / elapsed:,.0f}", flush=True)
+    print(f"  max in flight:  {state.stats['max_in_flight']}", flush=True)
+
+    ok = (len(results) == events
+          and state.stats["max_in_flight"] >= min(concurrency, n_batches)
+          and elapsed < expected + latency)
+    print("PASS" if ok else "FAIL", flush=True)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
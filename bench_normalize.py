@@ -0,0 +1,171 @@
+"""Benchmark event normalization: the old per-route loops vs normalize.normalize_many.
+
+Usage: python bench_normalize.py [events] [repeats]
+
+Pure CPU, no database. Each shape is timed on a synthetic payload of what that
+route receives, and the ids (and classifications) produced by both paths are
+checked to match.
+"""
+import gc
+import hashlib
+import sys
+import time
+from datetime import date
+
+import normalize
+
+AGENTS = {f"agent{i}@krs.insure": f"Agent {i}" for i in range(17)}
+
+def make_payload(n, classified=True):
+    """n events as the Apps Script pushes them; classified adds the label a local classifier attaches."""
+    events = [{
+        "agent": f"agent{i % 17}@krs.insure",
+        "title": f"Appointment {i}",
+        "start": f"2026-03-{1 + i % 28:02d}T{9 + i % 8:02d}:00:00-06:00",
+        "end": f"2026-03-{1 + i % 28:02d}T{10 + i % 8:02d}:00:00-06:00",
+        "description": "notes " * 20,
+        "location": "Office",
+        "allDay": i % 50 == 0,
+        "status": "confirmed",
+    } for i in range(n)]
+    if classified:
+        for i, ev in enumerate(events):
+            ev["classification"] = "sales" if i % 3 == 0 else ""
+    return events
+
+def legacy_sync(raw_events, wk="2026-W10"):
+    """What /api/sync did: build rows, then a second pass for pre-classified events."""
+    events = legacy_rows(raw_events, wk)
+    results = []
+    if any(ev.get("classification") for ev in raw_events):
+        results = [{"id": ev_db["id"], "classification": ev_raw["classification"],
+                    "confidence": ev_raw.get("confidence", 0.8), "reasoning": ev_raw.get("reasoning", "")}
+                   for ev_raw, ev_db in zip(raw_events, events) if ev_raw.get("classification")]
+    return events, results
+
+def legacy_classified(raw_events, wk="2026-W10"):
+    """The loop /api/sync-classified used."""
+    events = []
+    for ev in raw_events:
+        title = ev.get("title", "(No Title)")
+        agent = ev.get("agent", "Unknown")
+        start = ev.get("start", "")
+        events.append({
+            "id": hashlib.md5(f"{agent}_{start}_{title}".encode()).hexdigest(), "agent_name": agent,
+            "title": title, "start_time": start, "end_time": ev.get("end", ""),
+            "description": ev.get("description", ""), "location": ev.get("location", ""), "week_key": wk,
+            "is_all_day": ev.get("allDay", False), "status": ev.get("status", "confirmed"),
+            "classification": ev.get("classification", ""), "confidence": ev.get("confidence", 0),
+            "ai_reasoning": ev.get("reasoning", ""),
+        })
+    return events
+
+def legacy_rows(raw_events, wk="2026-W10"):
+    """The row-building loop /api/sync and /api/sync-redirect shared."""
+    events = []
+    for ev in raw_events:
+        title = ev.get("title", "(No Title)")
+        agent = ev.get("agent", "Unknown")
+        start = ev.get("start", "")
+        event_id = hashlib.md5(f"{agent}_{start}_{title}".encode()).hexdigest()
+        events.append({
+            "id": event_id, "agent_name": agent, "title": title, "start_time": start,
+            "end_time": ev.get("end", ""), "description": ev.get("description", ""),
+            "location": ev.get("location", ""), "week_key": wk,
+            "is_all_day": ev.get("allDay", False), "status": ev.get("status", "confirmed"),
+        })
+    return events
+
+def legacy_webhook(raw_events, wk="2026-W10"):
+    """The loop /api/webhook used: calendar ids mapped, all-day events dropped."""
+    incoming = []
+    for ev in raw_events:
+        if ev.get("allDay"):
+            continue
+        title = ev.get("title", "(No Title)")
+        agent = ev.get("agent", "Unknown")
+        if "@" in agent:
+            agent = AGENTS.get(agent, agent)
+        start = ev.get("start", "")
+        incoming.append({
+            "id": hashlib.md5(f"{agent}_{start}_{title}".encode()).hexdigest(), "agent_name": agent,
+            "title": title, "start_time": start, "end_time": ev.get("end", ""),
+            "description": ev.get("description", ""), "location": ev.get("location", ""), "week_key": wk,
+        })
+    return incoming
+
+def _week_key_for(start_str, memo):
+    """calendar_source's week-key helper the sheet parser called per row."""
+    day = start_str[:10]
+    if day not in memo:
+        iso = date.fromisoformat(day).isocalendar()
+        memo[day] = f"{iso[0]}-W{iso[1]:02d}"
+    return memo[day]
+
+def legacy_sheet(rows):
+    """The sheet parser's loop (calendar_source._parse_sheet_rows): week key from each start date."""
+    weeks, memo, skipped = {}, {}, 0
+    for row in rows:
+        start_str = row.get("start", "")
+        if not start_str:
+            continue
+        try:
+            week_key = _week_key_for(start_str, memo)
+        except ValueError:
+            skipped += 1
+            continue
+        title = row.get("title", "(No Title)")
+        agent = row.get("agent", "Unknown")
+        weeks.setdefault(week_key, []).append({
+            "id": hashlib.md5(f"{agent}_{start_str}_{title}".encode()).hexdigest(), "agent_name": agent,
+            "title": title, "start_time": start_str, "end_time": row.get("end", ""),
+            "description": row.get("description", ""), "location": row.get("location", ""),
+            "week_key": week_key, "is_all_day": row.get("allDay", "").upper() == "TRUE",
+            "status": row.get("status", "confirmed"),
+        })
+    return weeks
+
+SHAPES = [
+    ("sync", legacy_sync, lambda p: normalize.normalize_many(p, week_key="2026-W10", default_confidence=0.8)),
+    ("classified", legacy_classified, lambda p: normalize.normalize_many(p, week_key="2026-W10", default_confidence=0)),
+    ("webhook", legacy_webhook,
+     lambda p: normalize.normalize_many(p, week_key="2026-W10", agents=AGENTS, skip_all_day=True)),
+    ("sheet", legacy_sheet, lambda p: normalize.group_by_week(normalize.normalize_many(p))),
+]
+
+def _ids(result):
+    """(id, classification) per row, from a row list, {week: rows} or legacy_sync's (rows, results)."""
+    labels = {}
+    if isinstance(result, tuple):
+        result, results = result
+        labels = {r["id"]: r["classification"] for r in results}
+    rows = [r for rows in result.values() for r in rows] if isinstance(result, dict) else result
+    return [(r["id"], r.get("classification") or labels.get(r["id"])) for r in rows]
+
+def main():
+    # Short runs, many of them: the best of a few long runs swings by 10% or more on a shared CPU
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    payload = make_payload(n)
+    # The Apps Script push and the sheet it fills carry no classification
+    pushed = make_payload(n, classified=False)
+    sheet_rows = [{k: str(v).upper() if k == "allDay" else v for k, v in ev.items()} for ev in pushed]
+    print(f"{n} events, best of {repeats} (runs interleaved, GC off as in timeit)", flush=True)
+    for name, legacy, current in SHAPES:
+        data = {"webhook": pushed, "sheet": sheet_rows}.get(name, payload)
+        best = {"legacy": float("inf"), "normalize_many": float("inf")}
+        gc.disable()
+        try:
+            for _ in range(repeats):
+                for label, fn in (("legacy", legacy), ("normalize_many", current)):
+                    t0 = time.perf_counter()
+                    fn(data)
+                    best[label] = min(best[label], time.perf_counter() - t0)
+        finally:
+            gc.enable()
+        same = "rows match" if _ids(legacy(data)) == _ids(current(data)) else "ROWS DIFFER"
+        print(f"  {name:<10} legacy {n / best['legacy']:>10,.0f} ev/s  normalize_many {n / best['normalize_many']:>10,.0f} ev/s  "
+              f"({best['legacy'] / best['normalize_many']:.2f}x)  {same}", flush=True)
+
+if __name__ == "__main__":
+    main()
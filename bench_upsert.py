@@ -0,0 +1,72 @@
+"""Benchmark event upserts: legacy row-by-row loop vs the set-based bulk path.
+
+Usage: python bench_upsert.py [rows]
+
+Runs against DATABASE_URL when set (use a scratch database), otherwise a
+throwaway SQLite file. Rows are written to week_key 'bench' and removed after.
+"""
+import os
+import sys
+import time
+import tempfile
+
+if not os.environ.get("DATABASE_URL"):
+    os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import database as db
+
+WEEK = "bench"
+
+def make_events(n, version=0):
+    return [{
+        "id": f"bench-{i}",
+        "agent_name": f"Agent {i % 17}",
+        "title": f"Appointment {i}",
+        "start_time": f"2026-03-{1 + i % 28:02d}T{9 + i % 8:02d}:00:00Z",
+        "end_time": f"2026-03-{1 + i % 28:02d}T{10 + i % 8:02d}:00:00Z",
+        "description": f"notes v{version}",
+        "location": "Office",
+        "week_key": WEEK,
+    } for i in range(n)]
+
+def legacy_upsert(events):
+    """The previous implementation: one INSERT ... ON CONFLICT per event."""
+    with db.connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if db._is_pg() else "?"
+        conflict_ref = "EXCLUDED" if db._is_pg() else "excluded"
+        for event in events:
+            cur.execute(f"""
+                INSERT INTO events (id, agent_name, title, start_time, end_time, description, location, week_key)
+                VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+                ON CONFLICT(agent_name, title, start_time, week_key) DO UPDATE SET
+                    end_time={conflict_ref}.end_time, description={conflict_ref}.description, location={conflict_ref}.location
+            """, db._event_row(event)[:8])
+
+def clear():
+    # The week's rollup rows go in the same transaction, so agent_week_stats never counts deleted events
+    with db.connection() as conn:
+        ph = "%s" if db._is_pg() else "?"
+        cur = conn.cursor()
+        cur.execute(f"DELETE FROM events WHERE week_key={ph}", (WEEK,))
+        cur.execute(f"DELETE FROM agent_week_stats WHERE week_key={ph}", (WEEK,))
+
+def timed(label, fn, events):
+    t0 = time.perf_counter()
+    result = fn(events)
+    elapsed = time.perf_counter() - t0
+    extra = f"  {result}" if result else ""
+    print(f"  {label:<18} {len(events) / elapsed:>10,.0f} rows/s  ({elapsed * 1000:.0f} ms){extra}", flush=True)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    print(f"{n} events, backend={db.pool_stats()['backend']}", flush=True)
+    for label, fn in (("legacy", legacy_upsert), ("bulk", db.upsert_events_bulk)):
+        clear()
+        print(f"{label}:", flush=True)
+        timed("insert", fn, make_events(n))
+        timed("update", fn, make_events(n, version=1))
+    clear()
+
+if __name__ == "__main__":
+    main()
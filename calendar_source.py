@@ -1,12 +1,12 @@
 import json
 import os
-import sys
 import time
-import hashlib
+import codecs
 import csv
-import io
+import threading
 import requests
-from datetime import datetime, date, timedelta
+import normalize
+from datetime import date, timedelta
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
 
@@ -27,6 +27,16 @@ def get_week_bounds(week_key):
     sunday = monday + timedelta(days=6)
     return monday, sunday
 
+def week_range(first, last=None):
+    """ISO week keys from first to last inclusive, e.g. week_range("2026-W01", "2026-W10")."""
+    day, end = get_week_bounds(first)[0], get_week_bounds(last or first)[0]
+    weeks = []
+    while day <= end:
+        year, week, _ = day.isocalendar()
+        weeks.append(f"{year}-W{week:02d}")
+        day += timedelta(weeks=1)
+    return weeks
+
 def fetch_events(week_key):
     """Fetch events from Google Sheet (published CSV) and filter to the requested week."""
     config = load_config()
@@ -38,61 +48,86 @@ def fetch_events(week_key):
     # Default: read from Google Sheet
     return fetch_from_sheet(week_key)
 
-def fetch_from_sheet(week_key):
-    """Read events from the published Google Sheet RawEvents tab."""
+def fetch_events_range(start_week, end_week):
+    """Events for every week from start_week to end_week, as {week_key: [event, ...]}, from one sheet read."""
+    weeks = week_range(start_week, end_week)
+    if load_config().get("data_source", "sheet") == "manual":
+        return {wk: fetch_from_manual_json(wk) for wk in weeks}
+    index = _sheet_index(f"{start_week}..{end_week}")
+    by_week = {wk: [dict(e) for e in index.get(wk, [])] for wk in weeks}
+    print(f"[sync] Got {sum(len(v) for v in by_week.values())} events for {len(weeks)} weeks "
+          f"({start_week}..{end_week})", flush=True)
+    return by_week
+
+# Parsed RawEvents rows indexed by week key, revalidated with the sheet's ETag / Last-Modified
+SHEET_CACHE_SECONDS = float(os.environ.get("SHEET_CACHE_SECONDS", "60"))
+_sheet = {"url": None, "etag": None, "last_modified": None, "checked_at": 0.0, "weeks": {}, "rows": 0}
+_sheet_lock = threading.Lock()
+
+def _parse_sheet_rows(lines):
+    """Stream CSV lines into {week_key: [event, ...]}."""
+    errors = []
+    weeks = normalize.group_by_week(normalize.normalize_many(csv.DictReader(lines), errors=errors))
+    for index, message in errors[:5]:
+        print(f"[sync] Skipping row {index + 2}: {message}", flush=True)
+    if errors:
+        print(f"[sync] Skipped {len(errors)} rows without a usable start date", flush=True)
+    return weeks
+
+def _iter_lines(resp, chunk_size=64 * 1024):
+    """Decoded lines of a streamed response, newlines kept so csv sees quoted line breaks."""
+    decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+    tail = ""
+    for chunk in resp.iter_content(chunk_size):
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def _refresh_sheet(url):
+    """Re-read the sheet if it changed since the last fetch. Call with _sheet_lock held."""
+    headers = {}
+    if _sheet["url"] == url:
+        if _sheet["etag"]:
+            headers["If-None-Match"] = _sheet["etag"]
+        if _sheet["last_modified"]:
+            headers["If-Modified-Since"] = _sheet["last_modified"]
+    with requests.get(url, headers=headers, timeout=30, stream=True) as resp:
+        if resp.status_code == 304:
+            print("[sync] Sheet not modified; using parsed copy", flush=True)
+            _sheet["checked_at"] = time.monotonic()
+            return
+        if resp.status_code != 200:
+            raise Exception(f"Failed to read Sheet (HTTP {resp.status_code}). Make sure the sheet is shared as 'Anyone with the link'.")
+        t0 = time.perf_counter()
+        weeks = _parse_sheet_rows(_iter_lines(resp))
+    _sheet.update(url=url, etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"),
+                  checked_at=time.monotonic(), weeks=weeks, rows=sum(len(v) for v in weeks.values()))
+    print(f"[sync] Parsed {_sheet['rows']} sheet rows across {len(weeks)} weeks in {time.perf_counter() - t0:.2f}s", flush=True)
+
+def _sheet_index(label):
+    """The parsed RawEvents tab as {week_key: [event, ...]}, refreshed when stale. Treat it as read-only.
+
+    The whole tab is parsed once and kept indexed by week; within SHEET_CACHE_SECONDS
+    any week is a dict lookup, after that a conditional request revalidates it.
+    """
     config = load_config()
     sheet_id = config.get("google_sheet_id", "1uM22f664QVtHneL53nsmv5mHaJRmMWrLsQFEtvcMbxw")
     
     # Published CSV URL — works when sheet is shared as "Anyone with the link"
     url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet=RawEvents"
     
-    print(f"[sync] Fetching from Sheet for {week_key}...", flush=True)
-    resp = requests.get(url, timeout=30)
-    
-    if resp.status_code != 200:
-        raise Exception(f"Failed to read Sheet (HTTP {resp.status_code}). Make sure the sheet is shared as 'Anyone with the link'.")
-    
-    # Parse CSV
-    reader = csv.DictReader(io.StringIO(resp.text))
-    
-    monday, sunday = get_week_bounds(week_key)
-    events = []
-    
-    for row in reader:
-        try:
-            # Parse start time to check if it falls in the requested week
-            start_str = row.get("start", "")
-            if not start_str:
-                continue
-            
-            start_dt = datetime.fromisoformat(start_str.replace("Z", "+00:00"))
-            event_date = start_dt.date()
-            
-            if event_date < monday or event_date > sunday:
-                continue
-            
-            title = row.get("title", "(No Title)")
-            agent = row.get("agent", "Unknown")
-            
-            # Generate stable ID from agent + start + title
-            event_id = hashlib.md5(f"{agent}_{start_str}_{title}".encode()).hexdigest()
-            
-            events.append({
-                "id": event_id,
-                "agent_name": agent,
-                "title": title,
-                "start_time": start_str,
-                "end_time": row.get("end", ""),
-                "description": row.get("description", ""),
-                "location": row.get("location", ""),
-                "week_key": week_key,
-                "is_all_day": row.get("allDay", "").upper() == "TRUE",
-                "status": row.get("status", "confirmed")
-            })
-        except Exception as e:
-            print(f"[sync] Skipping row: {e}", flush=True)
-            continue
-    
+    with _sheet_lock:
+        if _sheet["url"] != url or time.monotonic() - _sheet["checked_at"] >= SHEET_CACHE_SECONDS:
+            print(f"[sync] Fetching from Sheet for {label}...", flush=True)
+            _refresh_sheet(url)
+        return _sheet["weeks"]
+
+def fetch_from_sheet(week_key):
+    """Read one week's events from the published Google Sheet RawEvents tab."""
+    events = [dict(e) for e in _sheet_index(week_key).get(week_key, [])]
     print(f"[sync] Got {len(events)} events for {week_key}", flush=True)
     return events
 
@@ -1,43 +1,201 @@
+import asyncio
+import concurrent.futures
 import json
+import sys
 import os
-import subprocess
-from openai import OpenAI
-from database import get_learned_examples, update_classification, get_unclassified_events
+import random
+import re
+import socket
+import threading
+import time
+import weakref
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APIStatusError, APIError
+from database import (get_learned_examples, update_classifications_bulk, iter_pending, iter_week_events, get_counter,
+                      get_cached_classifications, store_cached_classifications, classification_cache_size,
+                      enqueue_classification_job, claim_classification_job, heartbeat_classification_job,
+                      finish_classification_job, get_classification_job, list_classification_jobs,
+                      record_openai_batch, update_openai_batch, get_openai_batches)
+from rules import apply_rules, normalize_title
+from calendar_source import week_range
+import llm_cache
 
-PROGRESS_FILE = os.path.join(os.path.dirname(__file__), "classify_progress.json")
+MODEL = "gpt-4o-mini"
+# Bump when the prompt instructions change so cached title answers are not reused
+PROMPT_VERSION = "1"
+CACHE_VERSION = f"{MODEL}:{PROMPT_VERSION}"
 
-def load_config():
+# Batches are packed up to a token budget rather than a fixed count; see _batches()
+BATCH_TOKEN_BUDGET = 4000
+MAX_BATCH_EVENTS = 100
+# Compact results ({"id": 3, "c": "s", "r": "..."}) cost about this many output tokens each
+OUTPUT_TOKENS_PER_EVENT = 15
+# The compact protocol does not ask for a confidence; this is what gets stored
+DEFAULT_CONFIDENCE = 0.8
+MAX_ATTEMPTS = 5
+
+# Job queue: events are worked in chunks, with a heartbeat and resume point after each
+JOB_CHUNK_SIZE = 500
+# A running job whose heartbeat is older than this is taken over by another worker.
+# The heartbeat comes from a timer (_JobLease), not from finished batches, and it
+# must stay well above MAX_BACKOFF_SECONDS so a long 429 pause can't lose the job.
+JOB_STALE_SECONDS = 120
+JOB_HEARTBEAT_SECONDS = 15
+# Longest single rate-limit pause, whatever the reset headers ask for
+MAX_BACKOFF_SECONDS = 60
+JOB_MAX_ATTEMPTS = 3
+
+_cache_stats = {"hits": 0, "misses": 0}
+_cache_stats_lock = threading.Lock()
+
+_config_file = {"mtime": None, "data": {}}
+
+def _read_config_file():
+    """config.json contents, re-read only when the file changes."""
     config_path = os.path.join(os.path.dirname(__file__), "config.json")
-    if os.path.exists(config_path):
+    try:
+        mtime = os.path.getmtime(config_path)
+    except OSError:
+        return {}
+    if _config_file["mtime"] != mtime:
         with open(config_path) as f:
-            config = json.load(f)
-    else:
-        config = {}
+            _config_file["data"] = json.load(f)
+        _config_file["mtime"] = mtime
+    return _config_file["data"]
+
+def load_config():
+    config = dict(_read_config_file())
     config["openai_api_key"] = os.environ.get("OPENAI_API_KEY", config.get("openai_api_key", ""))
+    config["openai_base_url"] = os.environ.get("OPENAI_BASE_URL", config.get("openai_base_url", ""))
+    config["classify_concurrency"] = int(os.environ.get("CLASSIFY_CONCURRENCY", config.get("classify_concurrency", 4)))
+    config["openai_rpm"] = int(os.environ.get("OPENAI_RPM", config.get("openai_rpm", 500)))
+    config["openai_tpm"] = int(os.environ.get("OPENAI_TPM", config.get("openai_tpm", 200000)))
+    # "openai" sends everything the rules and cache miss to the API; "local" tries title_model first
+    config["classifier_mode"] = os.environ.get("CLASSIFIER_MODE", config.get("classifier_mode", "openai"))
+    config["local_model_threshold"] = float(os.environ.get("LOCAL_MODEL_THRESHOLD", config.get("local_model_threshold", 0.85)))
+    config["batch_token_budget"] = int(os.environ.get("BATCH_TOKEN_BUDGET", config.get("batch_token_budget", BATCH_TOKEN_BUDGET)))
+    config["batch_max_events"] = int(os.environ.get("BATCH_MAX_EVENTS", config.get("batch_max_events", MAX_BATCH_EVENTS)))
+    # "thread" runs the job worker inside the web process; "off" when a separate worker process runs it
+    config["classify_worker"] = os.environ.get("CLASSIFY_WORKER", config.get("classify_worker", "thread"))
     return config
 
-def get_progress():
-    try:
-        with open(PROGRESS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return {"running": False, "done": 0, "total": 0, "current": ""}
+def get_progress(week_key=None):
+    """Progress of a week's classification job (or the latest job), read from the job queue.
 
-def _write_progress(data):
-    tmp = PROGRESS_FILE + ".tmp"
-    with open(tmp, 'w') as f:
-        json.dump(data, f)
-    os.replace(tmp, PROGRESS_FILE)
+    "running" stays true while the job is queued so pollers keep waiting for it.
+    """
+    if week_key:
+        job = get_classification_job(week_key)
+    else:
+        jobs = list_classification_jobs(limit=1)
+        job = jobs[0] if jobs else None
+    if job is None:
+        return {"running": False, "status": "idle", "done": 0, "total": 0, "current": ""}
+    current = job["current"] or ""
+    if job["status"] == "queued":
+        current = "queued"
+    elif job["status"] == "failed":
+        current = f"error: {job['error']}"
+    return {"running": job["status"] in ("queued", "running"), "status": job["status"], "week": job["week_key"],
+            "job_id": job["id"], "done": job["done"], "total": job["total"], "current": current}
 
-def build_system_prompt():
-    examples = get_learned_examples()
-    examples_text = ""
-    if examples:
-        examples_text = "\n\nThe manager has corrected these classifications — learn from them:\n"
-        for ex in examples:
-            examples_text += f'- "{ex["event_title"]}" should be {ex["corrected_classification"]}\n'
+def cache_stats():
+    with _cache_stats_lock:
+        stats = dict(_cache_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["entries"] = classification_cache_size()
+    stats["version"] = _cache_version(get_counter("overrides_version"))
+    return stats
+
+def _cache_version(overrides_version):
+    """Title cache key for answers from the prompt built at this overrides version.
 
-    return f"""You classify calendar events for insurance agents at Key Retirement Solutions.
+    A new override changes the prompt's examples, so answers cached before it are
+    simply no longer looked up, including ones an in-flight job saves afterwards.
+    """
+    return f"{CACHE_VERSION}:{overrides_version}"
+
+def _apply_title_cache(events, count=True):
+    """Classify events whose normalized title is cached. Returns (results, misses).
+
+    Each distinct title counts once as a hit or a miss; count=False leaves the stats alone.
+    """
+    if not events:
+        return [], []
+    keys = {e["id"]: normalize_title(e["title"]) for e in events}
+    cached = get_cached_classifications(keys.values(), _cache_version(get_counter("overrides_version")))
+    results, misses = [], []
+    for e in events:
+        hit = cached.get(keys[e["id"]])
+        if hit:
+            results.append({"id": e["id"], "classification": hit["classification"],
+                            "confidence": hit["confidence"], "reasoning": hit["reasoning"]})
+        else:
+            misses.append(e)
+    if results:
+        update_classifications_bulk(results)
+    if count:
+        with _cache_stats_lock:
+            _cache_stats["hits"] += len(cached)
+            _cache_stats["misses"] += len(set(keys.values())) - len(cached)
+    return results, misses
+
+def _fill_repeats(results, sent, repeats):
+    """Give repeated titles the answers just returned for their representatives in `sent`."""
+    titles = {e["id"]: normalize_title(e["title"]) for e in sent}
+    answers = {titles[r["id"]]: r for r in results if r["id"] in titles}
+    filled = []
+    for e in repeats:
+        answer = answers.get(normalize_title(e["title"]))
+        if answer:
+            filled.append({**answer, "id": e["id"]})
+    if filled:
+        update_classifications_bulk(filled)
+    return filled
+
+def _apply_rules(events):
+    """Decide the obvious events locally. Returns (results, events left for the model)."""
+    results, remaining = apply_rules(events)
+    if results:
+        update_classifications_bulk(results)
+    return results, remaining
+
+def _apply_local_model(events):
+    """In local mode, let the trained title model answer what it is confident about.
+
+    Returns (results, events left for OpenAI). Without a trained model everything is left.
+    """
+    config = load_config()
+    if not events or config["classifier_mode"] != "local":
+        return [], events
+    import title_model
+    model = title_model.load()
+    if model is None:
+        print("[classify] classifier_mode is local but no title model is trained; using OpenAI", flush=True)
+        return [], events
+    results, remaining = title_model.classify(model, events, config["local_model_threshold"])
+    if results:
+        update_classifications_bulk(results)
+    print(f"[classify] Local model: {len(results)} decided, {len(remaining)} handed to OpenAI", flush=True)
+    return results, remaining
+
+def _split_repeated_titles(events):
+    """One representative per normalized title; the repeats get its answer afterwards."""
+    seen = set()
+    unique, repeats = [], []
+    for e in events:
+        key = normalize_title(e["title"])
+        if key in seen:
+            repeats.append(e)
+        else:
+            seen.add(key)
+            unique.append(e)
+    return unique, repeats
+
+# The instructions never change between batches, so they go first and stay
+# byte-identical; OpenAI's prompt caching then covers them. Learned examples,
+# the only part that varies, are appended last.
+STATIC_PROMPT = """You classify calendar events for insurance agents at Key Retirement Solutions.
 They sell Medicare supplements, LTC insurance, life insurance, annuities, and retirement planning.
 
 **sales** = a meeting with a client or prospect about insurance/financial products.
@@ -48,111 +206,674 @@ Events that contain what look like people's names (especially with product menti
 This includes: internal team meetings, training sessions, personal events, church, sports, errands, travel time, admin blocks, prospecting/calling blocks (prospecting is outreach, not a confirmed appointment), social events, family events, generic blocked time, office time, door knocking.
 
 If the title is ambiguous or empty, classify as not_sales.
-{examples_text}
-You will receive a JSON array of events. Classify ALL of them.
-Respond with a JSON object: {{"results": [{{"id": "event_id", "classification": "sales" or "not_sales", "confidence": 0.0-1.0, "reasoning": "brief reason"}}]}}"""
 
+You will receive a JSON array of events as {"id": <int>, "t": title, "a": agent}. Classify ALL of them.
+Respond with a JSON object: {"results": [{"id": <int>, "c": "s" or "n", "r": "brief reason"}]}
+Use "s" for sales, "n" for not_sales. Keep reasoning under 10 words."""
 
-def classify_batch_openai(events):
-    """Classify a batch of events using GPT-4o-mini."""
-    if not events:
-        return []
+# How often another process's override (overrides_version in app_meta) is noticed
+PROMPT_CHECK_SECONDS = 5
 
-    config = load_config()
-    client = OpenAI(api_key=config["openai_api_key"])
+_prompt = {"text": None, "version": None, "checked_at": 0.0}
+_prompt_lock = threading.Lock()
+
+def build_system_prompt():
+    examples = get_learned_examples()
+    if not examples:
+        return STATIC_PROMPT
+    examples_text = "\n\nThe manager has corrected these classifications — learn from them:\n"
+    for ex in examples:
+        examples_text += f'- "{ex["event_title"]}" should be {ex["corrected_classification"]}\n'
+    return STATIC_PROMPT + examples_text
+
+def get_system_prompt():
+    """The memoized system prompt, rebuilt only when the overrides version moves."""
+    return _system_prompt_and_version()[0]
+
+def _system_prompt_and_version():
+    """(prompt, overrides version it was built at); answers are cached under that version."""
+    with _prompt_lock:
+        now = time.monotonic()
+        if _prompt["text"] is not None and now - _prompt["checked_at"] < PROMPT_CHECK_SECONDS:
+            return _prompt["text"], _prompt["version"]
+        version = get_counter("overrides_version")
+        if _prompt["text"] is None or version != _prompt["version"]:
+            # Read the version first: an override landing mid-build is caught on the next check
+            _prompt["text"] = build_system_prompt()
+            _prompt["version"] = version
+        _prompt["checked_at"] = now
+        return _prompt["text"], _prompt["version"]
+
+def invalidate_prompt():
+    """Rebuild the prompt on next use; call after recording an override in this process."""
+    with _prompt_lock:
+        _prompt["text"] = None
+
+
+class RateLimiter:
+    """Token bucket for requests-per-minute and tokens-per-minute, shared by every in-flight batch.
+
+    After a 429 (or when the response headers say the window is used up) the whole
+    bucket pauses until the server's reset time instead of each batch retrying blindly.
+    """
+
+    def __init__(self, rpm, tpm):
+        self.rpm, self.tpm = max(rpm, 1), max(tpm, 1)
+        self._requests, self._tokens = float(self.rpm), float(self.tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens):
+        tokens = min(tokens, self.tpm)
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                else:
+                    wait = max((1 - self._requests) * 60 / self.rpm, (tokens - self._tokens) * 60 / self.tpm, 0.01)
+            await asyncio.sleep(wait)
 
-    event_list = [{"id": e["id"], "title": e["title"], "agent": e["agent_name"]} for e in events]
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
 
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def _parse_reset(value):
+    """Seconds from a rate-limit header: '1.5', '20ms', '6m0s'. None if absent or unparseable."""
+    if not value:
+        return None
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": build_system_prompt()},
-                {"role": "user", "content": json.dumps(event_list)}
-            ],
-            temperature=0.1,
-            response_format={"type": "json_object"}
-        )
-
-        raw = json.loads(resp.choices[0].message.content)
-
-        # Extract results list from response
-        results = None
-        if isinstance(raw, dict):
-            for v in raw.values():
-                if isinstance(v, list):
-                    results = v
-                    break
-        elif isinstance(raw, list):
-            results = raw
-
-        if not results:
-            print(f"[classify] Unexpected response: {list(raw.keys()) if isinstance(raw, dict) else type(raw)}", flush=True)
-            return []
+        return float(value)
+    except ValueError:
+        pass
+    seconds = sum(float(num) * _DURATION_UNITS[unit] for num, unit in _DURATION_PART.findall(value))
+    return seconds or None
 
-        # Update database
-        classified = 0
-        for r in results:
-            if "id" in r and "classification" in r:
-                cls = r["classification"].lower().strip()
-                if cls in ("sales", "not_sales"):
-                    update_classification(r["id"], cls, r.get("confidence", 0.5), r.get("reasoning", ""))
-                    classified += 1
+def _backoff_from_headers(headers, attempt):
+    """How long to pause after a 429: the server's reset hint, else jittered exponential."""
+    if headers is not None:
+        if headers.get("retry-after-ms"):
+            return min(float(headers["retry-after-ms"]) / 1000, MAX_BACKOFF_SECONDS)
+        hints = [_parse_reset(headers.get(h)) for h in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+        hints = [h for h in hints if h]
+        if hints:
+            return min(max(hints), MAX_BACKOFF_SECONDS)
+    return min(2 ** attempt, MAX_BACKOFF_SECONDS) * (0.5 + random.random())
 
-        print(f"[classify] Batch: sent {len(event_list)}, got {len(results)}, saved {classified}", flush=True)
-        return results
+def _throttle_from_headers(limiter, headers):
+    """Pause early when a successful response reports the window is exhausted."""
+    for remaining, reset in (("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+                             ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens")):
+        try:
+            if headers.get(remaining) is not None and int(headers[remaining]) <= 0:
+                limiter.pause(_parse_reset(headers.get(reset)) or 1.0)
+        except (TypeError, ValueError):
+            continue
+
+def _estimate_tokens(system_prompt, payload, n_events):
+    # ~4 characters per token on the way in, plus the compact results on the way out
+    return (len(system_prompt) + len(payload)) // 4 + OUTPUT_TOKENS_PER_EVENT * n_events
+
+def _encode_batch(events):
+    """Compact wire payload: position in the batch as id, t = title, a = agent."""
+    return json.dumps([{"id": i, "t": e["title"], "a": e["agent_name"]} for i, e in enumerate(events)],
+                      ensure_ascii=False, separators=(",", ":"))
+
+def _decode_results(events, raw_results):
+    """Map compact results back to real event ids. Unknown ids and labels are dropped."""
+    results = []
+    for r in raw_results:
+        if not isinstance(r, dict):
+            continue
+        try:
+            idx = int(r.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= idx < len(events):
+            continue
+        label = str(r.get("c", r.get("classification", ""))).lower().strip()
+        label = {"s": "sales", "n": "not_sales"}.get(label, label)
+        results.append({"id": events[idx]["id"], "classification": label,
+                        "confidence": r.get("confidence", DEFAULT_CONFIDENCE),
+                        "reasoning": r.get("r", r.get("reasoning", ""))})
+    return results
+
+def _parse_results(content):
+    raw = json.loads(content)
+    if isinstance(raw, dict):
+        for v in raw.values():
+            if isinstance(v, list):
+                return v
+    elif isinstance(raw, list):
+        return raw
+    print(f"[classify] Unexpected response: {list(raw.keys()) if isinstance(raw, dict) else type(raw)}", flush=True)
+    return []
+
+async def _request_batch(client, limiter, system_prompt, events, fresh=False):
+    """One chat completion for a batch, retried with rate-limit-aware backoff.
+
+    Returns results keyed by the real event ids; events the model skipped are
+    simply missing and stay unclassified. Answers go through llm_cache, so an
+    identical prompt and payload is served from disk without a request; with
+    fresh=True the model is asked (outside replay mode) and its answer replaces the
+    cached one.
+    """
+    payload = _encode_batch(events)
+    cache_key = llm_cache.cache_key(MODEL, system_prompt, payload, temperature=0.1, response_format="json_object")
+    cached = None
+    # Replay has no network to fall back on, so even a fresh run reads there
+    if not fresh or llm_cache.mode() == "replay":
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+    if cached is not None:
+        return _decode_results(events, _parse_results(cached))
+    tokens = _estimate_tokens(system_prompt, payload, len(events))
+    for attempt in range(MAX_ATTEMPTS):
+        await limiter.acquire(tokens)
+        try:
+            raw = await client.chat.completions.with_raw_response.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": payload}
+                ],
+                temperature=0.1,
+                response_format={"type": "json_object"}
+            )
+            _throttle_from_headers(limiter, raw.headers)
+            content = raw.parse().choices[0].message.content
+            results = _decode_results(events, _parse_results(content))
+            await asyncio.to_thread(llm_cache.put, cache_key, MODEL, content)
+            return results
+        except RateLimitError as e:
+            delay = _backoff_from_headers(getattr(e.response, "headers", None), attempt)
+            limiter.pause(delay)
+            print(f"[classify] 429 rate limited, pausing {delay:.1f}s (attempt {attempt + 1})", flush=True)
+        except APIStatusError as e:
+            if e.status_code < 500:
+                print(f"[classify] OpenAI error: {e} (not retryable)", flush=True)
+                return []
+            delay = min(2 ** attempt, 30) * (0.5 + random.random())
+            print(f"[classify] OpenAI error: {e} (attempt {attempt + 1}, retry in {delay:.1f}s)", flush=True)
+            await asyncio.sleep(delay)
+        except (APIError, ValueError) as e:
+            delay = min(2 ** attempt, 30) * (0.5 + random.random())
+            print(f"[classify] OpenAI error: {e} (attempt {attempt + 1}, retry in {delay:.1f}s)", flush=True)
+            await asyncio.sleep(delay)
+    print(f"[classify] Giving up on batch of {len(events)} after {MAX_ATTEMPTS} attempts", flush=True)
+    return []
+
+def _save_results(events, results, overrides_version=None):
+    """Validate results against the batch, write them in one transaction and cache them by title.
+
+    overrides_version is the one the answering prompt was built at; without it nothing is cached.
+    """
+    titles = {e["id"]: e["title"] for e in events}
+    valid = []
+    for r in results:
+        if "id" in r and "classification" in r and r["id"] in titles:
+            cls = str(r["classification"]).lower().strip()
+            if cls in ("sales", "not_sales"):
+                valid.append({"id": r["id"], "classification": cls,
+                              "confidence": r.get("confidence", 0.5), "reasoning": r.get("reasoning", "")})
+    update_classifications_bulk(valid)
+    if overrides_version is not None:
+        store_cached_classifications([(normalize_title(titles[r["id"]]), r["classification"], r["confidence"],
+                                       r["reasoning"]) for r in valid], _cache_version(overrides_version))
+    print(f"[classify] Batch: sent {len(events)}, got {len(results)}, saved {len(valid)}", flush=True)
+    return valid
+
+# Event loop -> (config key, AsyncOpenAI client, RateLimiter). Keyed on the loop
+# itself, not id(loop): a closed loop's id can be reused by a new one, which
+# would hand it a client bound to the dead loop. Entries go with their loop.
+_shared = weakref.WeakKeyDictionary()
+_shared_lock = threading.Lock()
+_loop_state = {"loop": None}
+_loop_lock = threading.Lock()
+
+def _shared_client(config):
+    """One AsyncOpenAI client and rate limiter per event loop, reused across batches.
 
-    except Exception as e:
-        print(f"[classify] OpenAI error: {e}", flush=True)
+    Keeping the client keeps its HTTP connections alive between batches; the
+    limiter carries the rpm/tpm budget from one call to the next.
+    """
+    loop = asyncio.get_running_loop()
+    key = (config["openai_api_key"], config["openai_base_url"], config["openai_rpm"], config["openai_tpm"])
+    with _shared_lock:
+        entry = _shared.get(loop)
+        if entry is None or entry[0] != key:
+            # Retries are ours (rate-limit aware), not the SDK's. Replay runs offline and may have no key.
+            api_key = config["openai_api_key"]
+            if not api_key and llm_cache.mode() == "replay":
+                api_key = "replay-only"
+            client = AsyncOpenAI(api_key=api_key, base_url=config["openai_base_url"] or None, max_retries=0)
+            entry = _shared[loop] = (key, client, RateLimiter(config["openai_rpm"], config["openai_tpm"]))
+    return entry[1], entry[2]
+
+def _run(coro):
+    """Run a coroutine on the classifier's long-lived event loop and wait for it.
+
+    asyncio.run() would make a new loop per call, and an async client cannot
+    outlive the loop it was used on, so sync callers share one loop thread.
+    """
+    return _submit(coro).result()
+
+def _submit(coro):
+    """Schedule a coroutine on the classifier loop; returns its concurrent.futures.Future."""
+    with _loop_lock:
+        if _loop_state["loop"] is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="classifier-loop", daemon=True).start()
+            _loop_state["loop"] = loop
+    return asyncio.run_coroutine_threadsafe(coro, _loop_state["loop"])
+
+async def classify_batches_async(batches, on_batch=None, concurrency=None, save=True, stop=None, fresh=False):
+    """Classify batches concurrently under the configured concurrency and rate limits.
+
+    on_batch(batch, results) is called on the event loop as each batch finishes (in
+    completion order), so it must not block. With save=False nothing is written to
+    the database; once the threading.Event `stop` is set, finished batches are
+    discarded instead of saved. fresh=True skips llm_cache reads (answers are still
+    stored). Returns all results.
+    """
+    if not batches:
         return []
+    config = load_config()
+    client, limiter = _shared_client(config)
+    slots = asyncio.Semaphore(concurrency or config["classify_concurrency"])
+    system_prompt, overrides_version = await asyncio.to_thread(_system_prompt_and_version)
+
+    async def run(batch):
+        async with slots:
+            results = await _request_batch(client, limiter, system_prompt, batch, fresh=fresh)
+        if stop is not None and stop.is_set():
+            return []
+        if save:
+            results = await asyncio.to_thread(_save_results, batch, results, overrides_version)
+        if on_batch:
+            on_batch(batch, results)
+        return results
 
+    per_batch = await asyncio.gather(*(run(b) for b in batches))
+    return [r for results in per_batch for r in results]
 
-def _classify_thread(week_key, reclassify_all=False):
-    """Background classification in a thread (no subprocess, no DB lock issues)."""
-    import time
-    try:
-        if reclassify_all:
-            from database import get_events_for_week
-            events = get_events_for_week(week_key)
-        else:
-            events = get_unclassified_events(week_key)
-        total = len(events)
-        _write_progress({"running": True, "done": 0, "total": total, "current": "starting..."})
-        
-        batch_size = 20
-        done = 0
-        for i in range(0, total, batch_size):
-            batch = events[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
-            _write_progress({"running": True, "done": done, "total": total, "current": f"Batch {batch_num}..."})
-            classify_batch_openai(batch)
-            done += len(batch)
-            _write_progress({"running": True, "done": done, "total": total, "current": f"Batch {batch_num} done"})
-            time.sleep(1)
-        
-        _write_progress({"running": False, "done": done, "total": total, "current": "complete"})
-    except Exception as e:
-        _write_progress({"running": False, "done": 0, "total": 0, "current": f"error: {e}"})
+def _event_tokens(event):
+    # Compact entry on the way in (~4 chars per token plus JSON punctuation) and its result on the way out
+    return (len(event.get("title") or "") + len(event.get("agent_name") or "") + 20) // 4 + OUTPUT_TOKENS_PER_EVENT
 
-def classify_events_async(week_key, reclassify_all=False):
-    """Start background classification in a thread."""
-    import threading
-    progress = get_progress()
-    if progress.get("running"):
-        return False
+def _batches(events, budget=None, max_events=None):
+    """Pack events into batches by estimated tokens, so short titles ride in bigger batches."""
+    if budget is None or max_events is None:
+        config = load_config()
+        budget = budget or config["batch_token_budget"]
+        max_events = max_events or config["batch_max_events"]
+    batches, current, used = [], [], 0
+    for e in events:
+        cost = _event_tokens(e)
+        if current and (used + cost > budget or len(current) >= max_events):
+            batches.append(current)
+            current, used = [], 0
+        current.append(e)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def classify_batch_openai(events):
+    """Classify a single batch and save the results. Rule and local-model answers skip the API call."""
+    results, remaining = _apply_rules(events)
+    local, remaining = _apply_local_model(remaining)
+    results.extend(local)
+    if remaining:
+        results.extend(_run(classify_batches_async([remaining])))
+    return results
 
-    _write_progress({"running": True, "done": 0, "total": 0, "current": "starting..."})
-    t = threading.Thread(target=_classify_thread, args=(week_key, reclassify_all), daemon=True)
-    t.start()
-    return True
+
+class _LeaseLost(Exception):
+    """Another worker took the job over after ours missed its heartbeats."""
+
+class _JobLease:
+    """A claimed job's heartbeat, kept fresh by a timer thread rather than by finished batches.
+
+    Progress is handed over with update(), which only touches memory and so is safe
+    to call from the event loop; the timer writes it out. When a heartbeat finds the
+    job taken over, the batches running under run() are cancelled.
+    """
+
+    def __init__(self, job, worker, interval=None):
+        self.job_id, self.worker, self.interval = job["id"], worker, interval or JOB_HEARTBEAT_SECONDS
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._fields = {}
+        self._future = None
+        self._thread = threading.Thread(target=self._keep, name=f"lease-{self.job_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def update(self, **fields):
+        with self._lock:
+            self._fields.update(fields)
+
+    def beat(self, **fields):
+        """Write pending progress and refresh the heartbeat now. Raises _LeaseLost if the job is gone."""
+        with self._lock:
+            fields = {**self._fields, **fields}
+            self._fields.clear()
+        if self.lost.is_set() or not heartbeat_classification_job(self.job_id, self.worker, **fields):
+            self._lose()
+            raise _LeaseLost(f"job {self.job_id} was taken over")
+
+    def _lose(self):
+        self.lost.set()
+        future = self._future
+        if future is not None:
+            future.cancel()
+
+    def _keep(self):
+        last = time.monotonic()
+        while not self._stop.wait(1.0):
+            with self._lock:
+                pending = bool(self._fields)
+            if not pending and time.monotonic() - last < self.interval:
+                continue
+            try:
+                self.beat()
+            except _LeaseLost:
+                print(f"[worker] Job {self.job_id} was taken over; cancelling its batches", flush=True)
+                return
+            except Exception as e:
+                print(f"[worker] Heartbeat for job {self.job_id} failed: {e}", flush=True)
+                continue
+            last = time.monotonic()
+
+    def run(self, coro):
+        """_run(coro), cancelled if the lease is lost while it runs."""
+        if self.lost.is_set():
+            coro.close()
+            raise _LeaseLost(f"job {self.job_id} was taken over")
+        self._future = _submit(coro)
+        try:
+            if self.lost.is_set():
+                self._future.cancel()
+            return self._future.result()
+        except concurrent.futures.CancelledError:
+            raise _LeaseLost(f"job {self.job_id} was taken over")
+        finally:
+            self._future = None
+
+def _classify_chunk(events, reclassify, on_progress, lease):
+    """Rules, title cache, local model, then OpenAI for one chunk.
+
+    on_progress(n, note) is called as events settle, partly from the event loop.
+    Returns the ids that were decided and saved.
+    """
+    decided, undecided = _apply_rules(events)
+    # Reclassify means a fresh answer from the model, so only plain runs read the title
+    # and response caches; the new answers still overwrite both
+    if reclassify:
+        misses = undecided
+    else:
+        cached, misses = _apply_title_cache(undecided)
+        decided += cached
+    local, misses = _apply_local_model(misses)
+    decided += local
+    to_send, repeats = _split_repeated_titles(misses)
+    batches = _batches(to_send)
+    on_progress(len(events) - len(to_send) - len(repeats), "decided locally")
+    sent = {"batches": 0}
+
+    def on_batch(batch, results):
+        sent["batches"] += 1
+        on_progress(len(batch), f"Batch {sent['batches']}/{len(batches)} done")
+
+    sent_results = lease.run(classify_batches_async(batches, on_batch=on_batch, stop=lease.lost, fresh=reclassify))
+    decided += sent_results
+    # Repeated titles take this run's answer for their representative, never an older cached one
+    decided += _fill_repeats(sent_results, to_send, repeats)
+    on_progress(len(repeats), "repeats filled")
+    return {r["id"] for r in decided}
+
+def _settled_prefix(chunk, decided):
+    """The id up to which every event of the chunk was saved, or None if the first one wasn't."""
+    last = None
+    for e in chunk:
+        if e["id"] not in decided:
+            break
+        last = e["id"]
+    return last
+
+def _run_job(job, worker):
+    """Work a claimed job to completion, resuming after job["last_id"] if it was interrupted.
+
+    last_id only moves past events that were saved, so events of a failed batch are
+    picked up again when the job is resumed.
+    """
+    week_key, reclassify = job["week_key"], bool(job["reclassify"])
+    source = iter_week_events(week_key, after_id=job["last_id"]) if reclassify \
+        else iter_pending(week_key=week_key, after_id=job["last_id"])
+    events = list(source)
+    if job["attempts"] == 1:
+        progress = {"done": 0, "total": len(events)}
+    else:
+        # Resumed after a crash: whatever is left now is what was not finished
+        progress = {"done": max(0, job["total"] - len(events)), "total": job["total"]}
+
+    with _JobLease(job, worker) as lease:
+        lease.beat(done=progress["done"], total=progress["total"],
+                   current="starting..." if job["attempts"] == 1 else "resuming...")
+
+        def on_progress(n, note):
+            progress["done"] += n
+            lease.update(done=progress["done"], current=note)
+
+        resume_ok = True
+        for i in range(0, len(events), JOB_CHUNK_SIZE):
+            chunk = events[i:i + JOB_CHUNK_SIZE]
+            decided = _classify_chunk(chunk, reclassify, on_progress, lease)
+            if resume_ok:
+                last_id = _settled_prefix(chunk, decided)
+                resume_ok = last_id == chunk[-1]["id"]
+                lease.beat(last_id=last_id)
+            else:
+                lease.beat()
+    finish_classification_job(job["id"], worker, "done", current="complete")
+    print(f"[worker] Job {job['id']} ({week_key}) complete: {progress['done']}/{progress['total']}", flush=True)
+
+_wake = threading.Event()
+_worker_state = {"thread": None, "stop": threading.Event()}
+_worker_lock = threading.Lock()
+
+def run_worker(stop=None, worker_id=None, poll_seconds=5, once=False):
+    """Claim and run classification jobs until `stop` is set, or until the queue is empty with once=True."""
+    stop = stop or threading.Event()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    print(f"[worker] {worker_id} waiting for classification jobs", flush=True)
+    while not stop.is_set():
+        try:
+            job = claim_classification_job(worker_id, stale_after=JOB_STALE_SECONDS)
+        except Exception as e:
+            print(f"[worker] Claim failed: {e}", flush=True)
+            stop.wait(poll_seconds)
+            continue
+        if job is None:
+            if once:
+                return
+            _wake.wait(poll_seconds)
+            _wake.clear()
+            continue
+        print(f"[worker] Claimed job {job['id']} ({job['week_key']}, attempt {job['attempts']})", flush=True)
+        if job["attempts"] > JOB_MAX_ATTEMPTS:
+            finish_classification_job(job["id"], worker_id, "failed", error=f"gave up after {JOB_MAX_ATTEMPTS} attempts")
+            continue
+        try:
+            _run_job(job, worker_id)
+        except _LeaseLost as e:
+            print(f"[worker] {e}; dropping it", flush=True)
+        except Exception as e:
+            print(f"[worker] Job {job['id']} failed: {e}", flush=True)
+            finish_classification_job(job["id"], worker_id, "failed", error=str(e))
+
+def start_worker_thread():
+    """Run the job worker in a daemon thread of this process (idempotent)."""
+    with _worker_lock:
+        if _worker_state["thread"] is None or not _worker_state["thread"].is_alive():
+            t = threading.Thread(target=run_worker, args=(_worker_state["stop"],), name="classify-worker", daemon=True)
+            t.start()
+            _worker_state["thread"] = t
+
+def classify_events_async(week_key, reclassify_all=False):
+    """Queue a week for classification. Returns (job, created); created is False if it was already queued."""
+    job, created = enqueue_classification_job(week_key, reclassify=reclassify_all)
+    _wake.set()
+    return job, created
 
 
 def classify_events(events):
-    """Synchronous batch classification."""
-    all_results = []
-    batch_size = 20
-    for i in range(0, len(events), batch_size):
-        batch = events[i:i+batch_size]
-        results = classify_batch_openai(batch)
-        all_results.extend(results)
+    """Synchronous batch classification. Rule matches and cached titles are answered without an API call."""
+    all_results, undecided = _apply_rules(events)
+    cached, misses = _apply_title_cache(undecided)
+    all_results.extend(cached)
+    local, misses = _apply_local_model(misses)
+    all_results.extend(local)
+    to_send, repeats = _split_repeated_titles(misses)
+    sent_results = _run(classify_batches_async(_batches(to_send)))
+    all_results.extend(sent_results)
+    all_results.extend(_fill_repeats(sent_results, to_send, repeats))
     return all_results
+
+
+# --- OpenAI Batch API backfills ----------------------------------------------
+# Historical weeks go through the asynchronous Batch API instead of live chat
+# completions: half the price, a separate rate limit, results within 24h.
+
+BATCH_API_TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+def _sync_client(config=None):
+    config = config or load_config()
+    return OpenAI(api_key=config["openai_api_key"], base_url=config["openai_base_url"] or None)
+
+def submit_backfill_batch(weeks):
+    """Send every pending event in `weeks` to the Batch API as one job.
+
+    Rules, the title cache and the local model still answer what they can first;
+    only the rest is uploaded. Returns a summary, or None when nothing needed the API.
+    """
+    busy = {w for b in get_openai_batches(pending_only=True) for w in b["weeks"]} & set(weeks)
+    if busy:
+        raise ValueError(f"already in an unapplied batch: {', '.join(sorted(busy))}")
+    events = [e for wk in weeks for e in iter_pending(week_key=wk)]
+    _, undecided = _apply_rules(events)
+    _, misses = _apply_title_cache(undecided)
+    _, misses = _apply_local_model(misses)
+    # Repeats are filled from the cache once the batch's answers are applied
+    to_send, repeats = _split_repeated_titles(misses)
+    if not to_send:
+        return None
+
+    system_prompt, overrides_version = _system_prompt_and_version()
+    requests, lines = {}, []
+    for n, batch in enumerate(_batches(to_send)):
+        custom_id = f"req-{n}"
+        requests[custom_id] = [[e["id"], e["title"]] for e in batch]
+        lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": {
+            "model": MODEL, "temperature": 0.1, "response_format": {"type": "json_object"},
+            "messages": [{"role": "system", "content": system_prompt},
+                         {"role": "user", "content": _encode_batch(batch)}]}}))
+    client = _sync_client()
+    upload = client.files.create(file=("backfill.jsonl", "\n".join(lines).encode(), "application/jsonl"), purpose="batch")
+    job = client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h",
+                                metadata={"weeks": f"{weeks[0]}..{weeks[-1]}"})
+    record_openai_batch(job.id, weeks, job.status, upload.id, requests, len(to_send), overrides_version)
+    print(f"[batch] Submitted {job.id}: {len(requests)} requests, {len(to_send)} events "
+          f"({len(repeats)} repeats, {len(events) - len(misses)} decided locally)", flush=True)
+    return {"batch_id": job.id, "status": job.status, "requests": len(requests), "events": len(to_send),
+            "repeats": len(repeats), "decided_locally": len(events) - len(misses)}
+
+def _apply_batch_output(row, text):
+    """Save the results in a batch output file. Returns how many events were classified."""
+    saved = 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        events = [{"id": event_id, "title": title} for event_id, title in row["requests"].get(item.get("custom_id"), [])]
+        response = item.get("response") or {}
+        if not events or response.get("status_code") != 200:
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            results = _decode_results(events, _parse_results(content))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"[batch] Skipping {item.get('custom_id')}: {e}", flush=True)
+            continue
+        saved += len(_save_results(events, results, row["overrides_version"]))
+    # Repeats were left out of the upload; they are answered from the cache if no override came in meanwhile
+    for wk in row["weeks"]:
+        _apply_title_cache(list(iter_pending(week_key=wk)), count=False)
+    return saved
+
+def poll_backfill_batches():
+    """Refresh every unapplied batch and apply the output of finished ones. Returns their latest state."""
+    client = _sync_client()
+    states = []
+    for row in get_openai_batches(pending_only=True, with_requests=True):
+        job = client.batches.retrieve(row["batch_id"])
+        fields = {"status": job.status, "output_file_id": job.output_file_id, "error_file_id": job.error_file_id}
+        if job.status in BATCH_API_TERMINAL:
+            # Expired and cancelled jobs still return the requests that finished
+            if job.output_file_id:
+                fields["saved"] = _apply_batch_output(row, client.files.content(job.output_file_id).text)
+            if job.status != "completed" and job.errors:
+                fields["error"] = "; ".join(e.message or e.code or "" for e in job.errors.data or [])
+            fields["applied"] = 1
+            fields["completed_at"] = time.time()
+            print(f"[batch] {job.id} {job.status}: {fields.get('saved', 0)}/{row['event_count']} events saved", flush=True)
+        update_openai_batch(row["batch_id"], **fields)
+        states.append({"batch_id": row["batch_id"], "weeks": row["weeks"], **fields})
+    return states
+
+def wait_for_backfill_batches(interval=60):
+    """Poll until every submitted batch has been applied."""
+    while True:
+        states = poll_backfill_batches()
+        if not any(s["status"] not in BATCH_API_TERMINAL for s in states):
+            return states
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "batch-submit" and len(sys.argv) >= 3:
+        weeks = week_range(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        print(json.dumps(submit_backfill_batch(weeks), indent=2), flush=True)
+    elif cmd == "batch-poll":
+        print(json.dumps(poll_backfill_batches(), indent=2), flush=True)
+    elif cmd == "batch-wait":
+        wait_for_backfill_batches(float(sys.argv[2]) if len(sys.argv) > 2 else 60)
+    elif cmd == "batch-list":
+        print(json.dumps(get_openai_batches(), indent=2), flush=True)
+    else:
+        print("usage: python classifier.py batch-submit FIRST_WEEK [LAST_WEEK] | batch-poll | batch-wait [seconds] | batch-list",
+              flush=True)
+        sys.exit(1)
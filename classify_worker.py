@@ -1,60 +1,36 @@
-"""Background worker: classifies all unclassified events for a week using GPT-4o-mini."""
+"""Classification worker: runs queued classification jobs from the classification_jobs table.
+
+    python classify_worker.py                          # run forever (Procfile `worker:` process)
+    python classify_worker.py <week_key> [--reclassify]  # queue one week, then drain the queue and exit
+
+Jobs are claimed with row locks, so this can run alongside the web process's
+worker thread; set CLASSIFY_WORKER=off on the web process to leave jobs to it.
+"""
 import sys
-import json
 import os
-import traceback
+import signal
+import threading
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-import database as db
 import classifier
 
-PROGRESS_FILE = classifier.PROGRESS_FILE
-
-def write_progress(data):
-    tmp = PROGRESS_FILE + ".tmp"
-    with open(tmp, 'w') as f:
-        json.dump(data, f)
-    os.replace(tmp, PROGRESS_FILE)
-
 def main():
-    week_key = sys.argv[1] if len(sys.argv) > 1 else None
-    if not week_key:
-        print("Usage: python classify_worker.py <week_key>", flush=True)
-        sys.exit(1)
-
-    try:
-        events = db.get_unclassified_events(week_key)
-        total = len(events)
-        print(f"[worker] Classifying {total} events for {week_key} via GPT-4o-mini", flush=True)
-        write_progress({"running": True, "done": 0, "total": total, "current": "starting..."})
-
-        batch_size = 20
-        done = 0
-        for i in range(0, total, batch_size):
-            batch = events[i:i+batch_size]
-            batch_num = i // batch_size + 1
-            write_progress({"running": True, "done": done, "total": total, "current": f"Batch {batch_num}..."})
-
-            try:
-                print(f"[worker] Starting batch {batch_num} ({len(batch)} events)...", flush=True)
-                results = classifier.classify_batch_openai(batch)
-                classified = len([r for r in results if "id" in r and "classification" in r])
-                done += classified
-                print(f"[worker] Batch {batch_num}: {len(batch)} sent, {classified} classified", flush=True)
-            except Exception as batch_ex:
-                print(f"[worker] Batch {batch_num} ERROR: {batch_ex}", flush=True)
-                import traceback
-                traceback.print_exc(file=sys.stdout)
-                sys.stdout.flush()
-
-        write_progress({"running": False, "done": done, "total": total, "current": ""})
-        print(f"[worker] Complete: {done}/{total} events classified", flush=True)
-
-    except Exception as ex:
-        print(f"[worker] Fatal error: {ex}", flush=True)
-        traceback.print_exc()
-        write_progress({"running": False, "done": 0, "total": 0, "current": f"Error: {str(ex)[:100]}"})
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    if args:
+        week_key = args[0]
+        job, created = classifier.classify_events_async(week_key, reclassify_all="--reclassify" in sys.argv)
+        print(f"[worker] {'Queued' if created else 'Already queued'}: job {job['id']} for {week_key}", flush=True)
+        classifier.run_worker(stop, once=True)
+        print(f"[worker] Queue drained: {classifier.get_progress(week_key)}", flush=True)
+    else:
+        try:
+            classifier.run_worker(stop)
+        except KeyboardInterrupt:
+            pass
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,29 @@
 import os
 import json
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "")
+SQLITE_PATH = os.environ.get("SQLITE_PATH", os.path.join(os.path.dirname(__file__), "krs_calendar.db"))
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+# The web process is one gunicorn gthread worker with 16 threads (Procfile). Up to
+# progress_feed.MAX_STREAMS (4) of them hold SSE streams, which touch the database
+# once per poll interval at most; the rest serve requests and wait for one of these
+# connections when more than DB_POOL_MAX need the database at the same moment.
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "5"))
 
-def get_db():
-    """Get a PostgreSQL connection (or fall back to SQLite for local dev)."""
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"checkouts": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "opened": 0, "discarded": 0, "in_use": 0}
+
+def _connect():
+    """Open a new raw connection (PostgreSQL, or SQLite for local dev)."""
     if DATABASE_URL:
         import psycopg2
         import psycopg2.extras
@@ -14,13 +32,123 @@ def get_db():
         return conn
     else:
         import sqlite3
-        DB_PATH = os.path.join(os.path.dirname(__file__), "krs_calendar.db")
-        conn = sqlite3.connect(DB_PATH, timeout=30)
+        conn = sqlite3.connect(SQLITE_PATH, timeout=30)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA busy_timeout=30000")
         return conn
 
+def get_db():
+    """Open a standalone connection the caller must close. Prefer `connection()`."""
+    return _connect()
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+                _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DATABASE_URL)
+    return _pool
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+def _checkout():
+    """Take a connection from the pool (PG) or this thread's persistent connection (SQLite)."""
+    if not _is_pg():
+        conn = getattr(_local, "sqlite_conn", None)
+        if conn is None:
+            conn = _connect()
+            _local.sqlite_conn = conn
+            _bump("opened")
+        waited = 0.0
+    else:
+        t0 = time.perf_counter()
+        _pool_slots.acquire()
+        try:
+            pool = _get_pool()
+            conn = pool.getconn()
+            if conn.closed:
+                pool.putconn(conn, close=True)
+                _bump("discarded")
+                conn = pool.getconn()
+        except Exception:
+            _pool_slots.release()
+            raise
+        waited = time.perf_counter() - t0
+    with _stats_lock:
+        _stats["checkouts"] += 1
+        _stats["in_use"] += 1
+        _stats["wait_seconds"] += waited
+        _stats["max_wait_seconds"] = max(_stats["max_wait_seconds"], waited)
+    return conn
+
+def _checkin(conn, broken=False):
+    _bump("in_use", -1)
+    if not _is_pg():
+        if broken:
+            _local.sqlite_conn = None
+            _bump("discarded")
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return
+    try:
+        _get_pool().putconn(conn, close=broken or bool(conn.closed))
+        if broken:
+            _bump("discarded")
+    finally:
+        _pool_slots.release()
+
+@contextmanager
+def connection():
+    """Check out a pooled connection for one transaction.
+
+    Commits when the block exits cleanly and rolls back on error. Nested calls on
+    the same thread reuse the outer connection, so they share its transaction.
+    """
+    active = getattr(_local, "active", None)
+    if active is not None:
+        _local.depth += 1
+        try:
+            yield active
+        finally:
+            _local.depth -= 1
+        return
+
+    conn = _checkout()
+    _local.active, _local.depth = conn, 0
+    ok = broken = False
+    try:
+        yield conn
+        conn.commit()
+        ok = True
+    finally:
+        _local.active = None
+        if not ok:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        _checkin(conn, broken)
+
+def pool_stats():
+    """Connection pool counters: checkouts, time spent waiting, and pool size."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["backend"] = "postgres" if _is_pg() else "sqlite"
+    stats["avg_wait_ms"] = round(1000 * stats["wait_seconds"] / stats["checkouts"], 3) if stats["checkouts"] else 0.0
+    if _is_pg() and _pool is not None:
+        stats["size"] = len(_pool._pool) + len(_pool._used)
+        stats["idle"] = len(_pool._pool)
+        stats["max"] = DB_POOL_MAX
+    else:
+        stats["size"] = stats["opened"] - stats["discarded"]
+    return stats
+
 def _is_pg():
     return bool(DATABASE_URL)
 
@@ -40,11 +168,19 @@ def _fetchall_dicts(cursor):
     cols = [d[0] for d in cursor.description]
     return [dict(zip(cols, row)) for row in cursor.fetchall()]
 
-def init_db():
-    conn = get_db()
-    cur = conn.cursor()
+# --- Schema migrations ------------------------------------------------------
+# Each step runs once, in order, inside one transaction, and is recorded in
+# schema_version. Add new steps to the end of MIGRATIONS; never edit old ones.
+
+MIGRATION_LOCK_ID = 4217001
+
+def _execute_all(cur, statements):
+    for sql in statements:
+        cur.execute(sql)
+
+def _m001_base_schema(cur):
     if _is_pg():
-        cur.execute("""
+        _execute_all(cur, ["""
             CREATE TABLE IF NOT EXISTS events (
                 id TEXT,
                 agent_name TEXT NOT NULL,
@@ -60,18 +196,7 @@ def init_db():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 week_key TEXT NOT NULL
             )
-        """)
-        cur.execute("""
-            CREATE UNIQUE INDEX IF NOT EXISTS idx_events_dedup 
-            ON events(agent_name, title, start_time, week_key)
-        """)
-        cur.execute("""
-            CREATE INDEX IF NOT EXISTS idx_events_agent_week ON events(agent_name, week_key)
-        """)
-        cur.execute("""
-            CREATE INDEX IF NOT EXISTS idx_events_week ON events(week_key)
-        """)
-        cur.execute("""
+        """, """
             CREATE TABLE IF NOT EXISTS overrides (
                 id SERIAL PRIMARY KEY,
                 event_title TEXT NOT NULL,
@@ -79,10 +204,9 @@ def init_db():
                 corrected_classification TEXT NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """)
-        conn.commit()
+        """])
     else:
-        cur.executescript("""
+        _execute_all(cur, ["""
             CREATE TABLE IF NOT EXISTS events (
                 id TEXT PRIMARY KEY,
                 agent_name TEXT NOT NULL,
@@ -97,139 +221,803 @@ def init_db():
                 override TEXT DEFAULT NULL,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 week_key TEXT NOT NULL
-            );
+            )
+        """, """
             CREATE TABLE IF NOT EXISTS overrides (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 event_title TEXT NOT NULL,
                 original_classification TEXT,
                 corrected_classification TEXT NOT NULL,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            );
-            CREATE UNIQUE INDEX IF NOT EXISTS idx_events_dedup ON events(agent_name, title, start_time, week_key);
-            CREATE INDEX IF NOT EXISTS idx_events_agent_week ON events(agent_name, week_key);
-            CREATE INDEX IF NOT EXISTS idx_events_week ON events(week_key);
-        """)
-        conn.commit()
-    conn.close()
+            )
+        """])
+    _execute_all(cur, [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_events_dedup ON events(agent_name, title, start_time, week_key)",
+        "CREATE INDEX IF NOT EXISTS idx_events_agent_week ON events(agent_name, week_key)",
+        "CREATE INDEX IF NOT EXISTS idx_events_week ON events(week_key)",
+    ])
 
-def upsert_event(event):
-    conn = get_db()
-    cur = conn.cursor()
+def _m002_agent_week_stats(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS agent_week_stats (
+            week_key TEXT NOT NULL,
+            agent_name TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            sales INTEGER NOT NULL DEFAULT 0,
+            not_sales INTEGER NOT NULL DEFAULT 0,
+            unclassified INTEGER NOT NULL DEFAULT 0,
+            overridden INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (week_key, agent_name)
+        )
+    """)
+    cur.execute("""
+        INSERT INTO agent_week_stats (week_key, agent_name, total, sales, not_sales, unclassified, overridden)
+        SELECT week_key, agent_name, COUNT(*),
+            SUM(CASE WHEN COALESCE(override, classification) = 'sales' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN COALESCE(override, classification) = 'not_sales' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN classification IS NULL OR classification = '' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN override IS NOT NULL THEN 1 ELSE 0 END)
+        FROM events GROUP BY week_key, agent_name
+    """)
+
+def _m003_access_paths(cur):
+    # Postgres events had no key on id, so every UPDATE ... WHERE id= was a seq scan.
+    # Not UNIQUE: mis-keyed pushes can store the same event id under two week keys.
     if _is_pg():
-        cur.execute("""
-            INSERT INTO events (id, agent_name, title, start_time, end_time, description, location, week_key)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT(agent_name, title, start_time, week_key) DO UPDATE SET
-                end_time=EXCLUDED.end_time, description=EXCLUDED.description, location=EXCLUDED.location
-        """, (event['id'], event['agent_name'], event['title'], event['start_time'],
-              event.get('end_time',''), event.get('description',''), event.get('location',''), event['week_key']))
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_events_id ON events(id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_overrides_created ON overrides(created_at)")
+
+def _m004_pending_index(cur):
+    # Partial index: only rows awaiting classification, so it stays small as history grows
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_pending ON events(week_key, id) WHERE classification IS NULL")
+
+def _m005_classification_cache(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS classification_cache (
+            title_key TEXT NOT NULL,
+            version TEXT NOT NULL,
+            classification TEXT NOT NULL,
+            confidence REAL DEFAULT NULL,
+            reasoning TEXT DEFAULT '',
+            hits INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (title_key, version)
+        )
+    """)
+
+def _add_column(cur, table, column, ddl):
+    if _is_pg():
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}")
+        return
+    cur.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in cur.fetchall()}:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+def _m006_fingerprints_tombstones(cur):
+    _add_column(cur, "events", "fingerprint", "TEXT DEFAULT NULL")
+    _add_column(cur, "events", "deleted_at", "TEXT DEFAULT NULL")
+    _execute_all(cur, [
+        "DROP INDEX IF EXISTS idx_events_pending",
+        "CREATE INDEX idx_events_pending ON events(week_key, id) WHERE classification IS NULL AND deleted_at IS NULL",
+    ])
+
+def _m007_app_meta(cur):
+    # Small named counters, e.g. overrides_version, which tells other processes
+    # that cached prompts built from the overrides are stale
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+def _m008_classification_jobs(cur):
+    # Times are epoch seconds so heartbeat comparisons work the same on both backends
+    pk = "SERIAL PRIMARY KEY" if _is_pg() else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    epoch = "DOUBLE PRECISION" if _is_pg() else "REAL"
+    _execute_all(cur, [f"""
+        CREATE TABLE IF NOT EXISTS classification_jobs (
+            id {pk},
+            week_key TEXT NOT NULL,
+            reclassify INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            done INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            current TEXT DEFAULT '',
+            last_id TEXT DEFAULT NULL,
+            worker TEXT DEFAULT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT DEFAULT NULL,
+            created_at {epoch} NOT NULL,
+            started_at {epoch} DEFAULT NULL,
+            heartbeat_at {epoch} DEFAULT NULL,
+            finished_at {epoch} DEFAULT NULL
+        )
+    """,
+        # At most one queued-or-running job per week; enqueueing again is a no-op
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_week ON classification_jobs(week_key) WHERE status IN ('queued', 'running')",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON classification_jobs(status, created_at)",
+    ])
+
+def _m009_openai_batches(cur):
+    # requests holds {custom_id: [[event_id, title], ...]} in the order the events were sent
+    epoch = "DOUBLE PRECISION" if _is_pg() else "REAL"
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS openai_batches (
+            batch_id TEXT PRIMARY KEY,
+            weeks TEXT NOT NULL,
+            status TEXT NOT NULL,
+            input_file_id TEXT,
+            output_file_id TEXT DEFAULT NULL,
+            error_file_id TEXT DEFAULT NULL,
+            request_count INTEGER NOT NULL DEFAULT 0,
+            event_count INTEGER NOT NULL DEFAULT 0,
+            saved INTEGER NOT NULL DEFAULT 0,
+            applied INTEGER NOT NULL DEFAULT 0,
+            requests TEXT NOT NULL,
+            error TEXT DEFAULT NULL,
+            created_at {epoch} NOT NULL,
+            completed_at {epoch} DEFAULT NULL
+        )
+    """)
+
+def _m010_batch_overrides_version(cur):
+    # The overrides version the batch's prompt was built at, so its answers are cached under it
+    _add_column(cur, "openai_batches", "overrides_version", "INTEGER DEFAULT NULL")
+
+def _m011_events_all_day(cur):
+    # Lets a webhook snapshot, which never carries all-day events, skip them when tombstoning
+    _add_column(cur, "events", "is_all_day", "INTEGER NOT NULL DEFAULT 0")
+
+def _m012_empty_classification(cur):
+    # Older /api/sync-classified uploads stored '' for "no label"; pending means NULL
+    cur.execute("UPDATE events SET classification = NULL WHERE classification = ''")
+
+MIGRATIONS = [
+    (1, "base events/overrides schema", _m001_base_schema),
+    (2, "agent_week_stats rollup", _m002_agent_week_stats),
+    (3, "events.id and overrides.created_at indexes", _m003_access_paths),
+    (4, "partial index on pending (unclassified) events", _m004_pending_index),
+    (5, "title-level classification cache", _m005_classification_cache),
+    (6, "event content fingerprints and tombstones", _m006_fingerprints_tombstones),
+    (7, "app_meta counters", _m007_app_meta),
+    (8, "classification job queue", _m008_classification_jobs),
+    (9, "OpenAI Batch API submissions", _m009_openai_batches),
+    (10, "overrides version on OpenAI batches", _m010_batch_overrides_version),
+    (11, "events.is_all_day", _m011_events_all_day),
+    (12, "empty classifications to NULL", _m012_empty_classification),
+]
+
+def _schema_version(cur):
+    if _is_pg():
+        cur.execute("SELECT to_regclass('schema_version')")
+        exists = cur.fetchone()[0] is not None
     else:
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='schema_version'")
+        exists = cur.fetchone() is not None
+    if not exists:
+        return 0
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+def migrate():
+    """Apply pending migrations in order. Returns the versions applied.
+
+    An up-to-date database costs one catalog lookup and one MAX() query.
+    """
+    latest = MIGRATIONS[-1][0]
+    with connection() as conn:
+        if _schema_version(conn.cursor()) >= latest:
+            return []
+    applied = []
+    with connection() as conn:
+        cur = conn.cursor()
+        # Only one process migrates; the others wait here and then find nothing to do
+        if _is_pg():
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        else:
+            cur.execute("BEGIN IMMEDIATE")
         cur.execute("""
-            INSERT INTO events (id, agent_name, title, start_time, end_time, description, location, week_key)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(agent_name, title, start_time, week_key) DO UPDATE SET
-                end_time=excluded.end_time, description=excluded.description, location=excluded.location
-        """, (event['id'], event['agent_name'], event['title'], event['start_time'],
-              event.get('end_time',''), event.get('description',''), event.get('location',''), event['week_key']))
-    conn.commit()
-    conn.close()
-
-def upsert_events_bulk(events):
-    """Insert/update many events in a single transaction."""
-    conn = get_db()
-    cur = conn.cursor()
-    ph = "%s" if _is_pg() else "?"
-    conflict_ref = "EXCLUDED" if _is_pg() else "excluded"
-    for event in events:
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        current = _schema_version(cur)
+        ph = "%s" if _is_pg() else "?"
+        for version, description, step in MIGRATIONS:
+            if version <= current:
+                continue
+            step(cur)
+            cur.execute(f"INSERT INTO schema_version (version, description) VALUES ({ph}, {ph})", (version, description))
+            applied.append(version)
+            print(f"[db] Applied migration {version}: {description}", flush=True)
+    return applied
+
+# An event awaiting classification. count_pending, iter_pending and the rollup's
+# unclassified column all use this, so the dashboard and the job queue count the
+# same rows; it is also the condition of the partial index idx_events_pending.
+_PENDING = "classification IS NULL AND deleted_at IS NULL"
+
+_ROLLUP_COLUMNS = "week_key, agent_name, total, sales, not_sales, unclassified, overridden"
+_ROLLUP_SELECT = f"""
+    SELECT week_key, agent_name, COUNT(*),
+        SUM(CASE WHEN COALESCE(override, classification) = 'sales' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN COALESCE(override, classification) = 'not_sales' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN {_PENDING} THEN 1 ELSE 0 END),
+        SUM(CASE WHEN override IS NOT NULL THEN 1 ELSE 0 END)
+    FROM events WHERE deleted_at IS NULL
+"""
+
+def _refresh_agent_week_stats(cur, pairs):
+    """Recompute the rollup rows for the touched (week_key, agent_name) pairs.
+
+    Runs on the caller's cursor so the rollup commits (or rolls back) together
+    with the write that changed the events.
+    """
+    ph = "%s" if _is_pg() else "?"
+    by_week = {}
+    for week_key, agent_name in pairs:
+        by_week.setdefault(week_key, set()).add(agent_name)
+    for week_key in sorted(by_week):
+        agents = sorted(by_week[week_key])
+        marks = ",".join([ph] * len(agents))
+        if _is_pg():
+            # Serialize refreshes per week so concurrent writers never store a stale aggregate
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (week_key,))
+        cur.execute(f"""
+            INSERT INTO agent_week_stats ({_ROLLUP_COLUMNS})
+            {_ROLLUP_SELECT} AND week_key={ph} AND agent_name IN ({marks})
+            GROUP BY week_key, agent_name
+            ON CONFLICT(week_key, agent_name) DO UPDATE SET
+                total=excluded.total, sales=excluded.sales, not_sales=excluded.not_sales,
+                unclassified=excluded.unclassified, overridden=excluded.overridden
+        """, [week_key, *agents])
         cur.execute(f"""
-            INSERT INTO events (id, agent_name, title, start_time, end_time, description, location, week_key)
-            VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
-            ON CONFLICT(agent_name, title, start_time, week_key) DO UPDATE SET
-                end_time={conflict_ref}.end_time, description={conflict_ref}.description, location={conflict_ref}.location
-        """, (event['id'], event['agent_name'], event['title'], event['start_time'],
-              event.get('end_time',''), event.get('description',''), event.get('location',''), event['week_key']))
-    conn.commit()
-    conn.close()
+            DELETE FROM agent_week_stats WHERE week_key={ph} AND agent_name IN ({marks})
+            AND NOT EXISTS (SELECT 1 FROM events e WHERE e.week_key=agent_week_stats.week_key
+                            AND e.agent_name=agent_week_stats.agent_name AND e.deleted_at IS NULL)
+        """, [week_key, *agents])
+
+def _rebuild_agent_week_stats(cur, week_key=None):
+    ph = "%s" if _is_pg() else "?"
+    if week_key:
+        cur.execute(f"DELETE FROM agent_week_stats WHERE week_key={ph}", (week_key,))
+        cur.execute(f"INSERT INTO agent_week_stats ({_ROLLUP_COLUMNS}) {_ROLLUP_SELECT} AND week_key={ph} GROUP BY week_key, agent_name", (week_key,))
+    else:
+        cur.execute("DELETE FROM agent_week_stats")
+        cur.execute(f"INSERT INTO agent_week_stats ({_ROLLUP_COLUMNS}) {_ROLLUP_SELECT} GROUP BY week_key, agent_name")
+
+def rebuild_agent_week_stats(week_key=None):
+    """Recompute the rollup from the events table (one week, or everything) to fix drift."""
+    with connection() as conn:
+        cur = conn.cursor()
+        if _is_pg():
+            cur.execute("LOCK TABLE agent_week_stats IN EXCLUSIVE MODE")
+        _rebuild_agent_week_stats(cur, week_key)
+
+def event_fingerprint(event):
+    """Hash of the mutable content; agent, title, start and week already form the row key."""
+    content = "\x1f".join((event.get('end_time') or '', event.get('description') or '', event.get('location') or ''))
+    return hashlib.md5(content.encode()).hexdigest()
+
+def _event_row(event):
+    return (event['id'], event['agent_name'], event['title'], event['start_time'],
+            event.get('end_time',''), event.get('description',''), event.get('location',''), event['week_key'],
+            event_fingerprint(event), 1 if event.get('is_all_day') else 0)
+
+def _dedupe_rows(events):
+    """One row per (agent, title, start, week): a multi-row upsert may not touch a row twice."""
+    rows = {}
+    for event in events:
+        row = _event_row(event)
+        rows[(row[1], row[2], row[3], row[7])] = row
+    return list(rows.values())
+
+def upsert_event(event):
+    return upsert_events_bulk([event])
+
+def upsert_events_bulk(events, page_size=1000):
+    """Insert/update many events in a single transaction with set-based statements.
+
+    PostgreSQL sends multi-row VALUES pages via execute_values; SQLite uses executemany.
+    Existing rows are only rewritten when their content fingerprint changed or they
+    were tombstoned. Returns {"inserted": n, "updated": n, "unchanged": n}.
+    """
+    rows = _dedupe_rows(events)
+    if not rows:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+    with connection() as conn:
+        cur = conn.cursor()
+        if _is_pg():
+            from psycopg2.extras import execute_values
+            flags = execute_values(cur, """
+                INSERT INTO events (id, agent_name, title, start_time, end_time, description, location, week_key,
+                                    fingerprint, is_all_day)
+                VALUES %s
+                ON CONFLICT(agent_name, title, start_time, week_key) DO UPDATE SET
+                    end_time=EXCLUDED.end_time, description=EXCLUDED.description, location=EXCLUDED.location,
+                    fingerprint=EXCLUDED.fingerprint, is_all_day=EXCLUDED.is_all_day, deleted_at=NULL
+                WHERE events.fingerprint IS DISTINCT FROM EXCLUDED.fingerprint OR events.deleted_at IS NOT NULL
+                    OR events.is_all_day <> EXCLUDED.is_all_day
+                RETURNING (xmax = 0)
+            """, rows, page_size=page_size, fetch=True)
+            inserted = sum(1 for (was_insert,) in flags if was_insert)
+            changed = len(flags)
+        else:
+            weeks = sorted({row[7] for row in rows})
+            count_sql = f"SELECT COUNT(*) FROM events WHERE week_key IN ({','.join('?' * len(weeks))})"
+            cur.execute(count_sql, weeks)
+            before = cur.fetchone()[0]
+            changes_before = conn.total_changes
+            cur.executemany("""
+                INSERT INTO events (id, agent_name, title, start_time, end_time, description, location, week_key,
+                                    fingerprint, is_all_day)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(agent_name, title, start_time, week_key) DO UPDATE SET
+                    end_time=excluded.end_time, description=excluded.description, location=excluded.location,
+                    fingerprint=excluded.fingerprint, is_all_day=excluded.is_all_day, deleted_at=NULL
+                WHERE events.fingerprint IS NOT excluded.fingerprint OR events.deleted_at IS NOT NULL
+                    OR events.is_all_day <> excluded.is_all_day
+            """, rows)
+            changed = conn.total_changes - changes_before
+            cur.execute(count_sql, weeks)
+            inserted = cur.fetchone()[0] - before
+        if changed:
+            # Updates can revive tombstoned rows, so they may move the counts too
+            _refresh_agent_week_stats(cur, {(row[7], row[1]) for row in rows})
+    return {"inserted": inserted, "updated": changed - inserted, "unchanged": len(rows) - changed}
+
+def apply_week_snapshot(week_key, events, full_week=True, with_all_day=True):
+    """Reconcile a week's stored events with a pushed snapshot in one transaction.
+
+    New events are inserted and only rows whose fingerprint changed are rewritten.
+    For a full-week push, stored events of the pushed agents that are missing from
+    the snapshot are tombstoned (deleted_at set), so deletions and cancellations
+    leave the dashboard. Agents absent from the push are left alone, since a
+    calendar that failed to load should not wipe that agent's week. A snapshot
+    taken without all-day events (with_all_day=False) leaves stored all-day rows alone.
+    """
+    ph = "%s" if _is_pg() else "?"
+    incoming = {e["id"]: e for e in events}
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT id, agent_name, fingerprint, deleted_at, is_all_day FROM events WHERE week_key={ph}",
+                    (week_key,))
+        existing = {row[0]: row for row in cur.fetchall()}
+        changed = [e for event_id, e in incoming.items()
+                   if event_id not in existing
+                   or existing[event_id][2] != event_fingerprint(e)
+                   or existing[event_id][3] is not None]
+        result = upsert_events_bulk(changed) if changed else {"inserted": 0, "updated": 0, "unchanged": 0}
+        result["unchanged"] += len(incoming) - len(changed)
+
+        gone = []
+        if full_week:
+            agents = {e["agent_name"] for e in incoming.values()}
+            gone = [row for event_id, row in existing.items()
+                    if event_id not in incoming and row[3] is None and row[1] in agents
+                    and (with_all_day or not row[4])]
+        if gone:
+            deleted_at = datetime.utcnow().isoformat(timespec="seconds")
+            ids = [row[0] for row in gone]
+            if _is_pg():
+                cur.execute("UPDATE events SET deleted_at=%s WHERE week_key=%s AND id = ANY(%s)", (deleted_at, week_key, ids))
+            else:
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i+500]
+                    cur.execute(f"UPDATE events SET deleted_at=? WHERE week_key=? AND id IN ({','.join('?' * len(chunk))})",
+                                (deleted_at, week_key, *chunk))
+            _refresh_agent_week_stats(cur, {(week_key, row[1]) for row in gone})
+        result["deleted"] = len(gone)
+    return result
 
 def get_event_ids_for_week(week_key):
     """Return a set of event IDs for a given week (fast lookup for dedup)."""
-    conn = get_db()
-    cur = conn.cursor()
-    ph = "%s" if _is_pg() else "?"
-    cur.execute(f"SELECT id FROM events WHERE week_key={ph}", (week_key,))
-    ids = {row[0] for row in cur.fetchall()}
-    conn.close()
-    return ids
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        cur.execute(f"SELECT id FROM events WHERE week_key={ph} AND deleted_at IS NULL", (week_key,))
+        return {row[0] for row in cur.fetchall()}
 
 def get_events_for_week(week_key, agent_name=None):
-    conn = get_db()
-    cur = conn.cursor()
-    ph = "%s" if _is_pg() else "?"
-    if agent_name:
-        cur.execute(f"SELECT * FROM events WHERE week_key={ph} AND agent_name={ph} ORDER BY start_time", (week_key, agent_name))
-    else:
-        cur.execute(f"SELECT * FROM events WHERE week_key={ph} ORDER BY agent_name, start_time", (week_key,))
-    rows = _fetchall_dicts(cur)
-    conn.close()
-    return rows
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        if agent_name:
+            cur.execute(f"SELECT * FROM events WHERE week_key={ph} AND agent_name={ph} AND deleted_at IS NULL ORDER BY start_time", (week_key, agent_name))
+        else:
+            cur.execute(f"SELECT * FROM events WHERE week_key={ph} AND deleted_at IS NULL ORDER BY agent_name, start_time", (week_key,))
+        return _fetchall_dicts(cur)
 
 def get_unclassified_events(week_key=None):
-    conn = get_db()
-    cur = conn.cursor()
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        if week_key:
+            cur.execute(f"SELECT * FROM events WHERE {_PENDING} AND week_key={ph}", (week_key,))
+        else:
+            cur.execute(f"SELECT * FROM events WHERE {_PENDING}")
+        return _fetchall_dicts(cur)
+
+def count_pending(week_key=None):
+    """Number of events awaiting classification, counted from the partial pending index."""
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        if week_key:
+            cur.execute(f"SELECT COUNT(*) FROM events WHERE {_PENDING} AND week_key={ph}", (week_key,))
+        else:
+            cur.execute(f"SELECT COUNT(*) FROM events WHERE {_PENDING}")
+        return cur.fetchone()[0]
+
+def _iter_keyset(where, params, limit, page_size, after_id):
     ph = "%s" if _is_pg() else "?"
+    last_id = after_id or ""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        with connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT id, agent_name, title, week_key FROM events WHERE {where} AND id > {ph} ORDER BY id LIMIT {ph}",
+                        (*params, last_id, size))
+            page = _fetchall_dicts(cur)
+        yield from page
+        if len(page) < size:
+            return
+        last_id = page[-1]["id"]
+        if remaining is not None:
+            remaining -= len(page)
+
+def iter_pending(limit=None, week_key=None, page_size=500, after_id=None):
+    """Yield pending events (id, agent_name, title, week_key) in id order.
+
+    Pages through the pending index with keyset pagination, one short checkout per
+    page, so a slow consumer never holds a connection.
+    """
+    ph = "%s" if _is_pg() else "?"
+    where, params = _PENDING, []
     if week_key:
-        cur.execute(f"SELECT * FROM events WHERE classification IS NULL AND week_key={ph}", (week_key,))
-    else:
-        cur.execute("SELECT * FROM events WHERE classification IS NULL")
-    rows = _fetchall_dicts(cur)
-    conn.close()
-    return rows
+        where += f" AND week_key={ph}"
+        params.append(week_key)
+    yield from _iter_keyset(where, params, limit, page_size, after_id)
 
-def update_classification(event_id, classification, confidence, reasoning=""):
-    conn = get_db()
-    cur = conn.cursor()
+def iter_week_events(week_key, page_size=500, after_id=None):
+    """Yield every live event of a week (id, agent_name, title, week_key) in id order."""
     ph = "%s" if _is_pg() else "?"
-    cur.execute(f"UPDATE events SET classification={ph}, confidence={ph}, ai_reasoning={ph} WHERE id={ph}",
-                (classification, confidence, reasoning, event_id))
-    conn.commit()
-    conn.close()
+    yield from _iter_keyset(f"deleted_at IS NULL AND week_key={ph}", [week_key], None, page_size, after_id)
+
+def update_classification(event_id, classification, confidence, reasoning=""):
+    return update_classifications_bulk([{"id": event_id, "classification": classification,
+                                         "confidence": confidence, "reasoning": reasoning}])
+
+def update_classifications_bulk(results, week_key=None, page_size=1000):
+    """Apply a batch of classification results in one transaction.
+
+    Each result is a dict with id, classification, confidence and reasoning. When
+    week_key is given, only rows in that week are touched. Returns rows updated.
+    """
+    # An empty label is stored as NULL, so the event stays pending rather than neither
+    rows = [(r["id"], r["classification"] or None, r.get("confidence"), r.get("reasoning", r.get("ai_reasoning", "")))
+            for r in results]
+    if not rows:
+        return 0
+    with connection() as conn:
+        cur = conn.cursor()
+        if _is_pg():
+            from psycopg2.extras import execute_values
+            week_filter = ""
+            if week_key:
+                rows = [row + (week_key,) for row in rows]
+                week_filter = " AND e.week_key = v.week_key"
+            updated = execute_values(cur, f"""
+                UPDATE events AS e SET classification=v.classification, confidence=v.confidence, ai_reasoning=v.reasoning
+                FROM (VALUES %s) AS v(id, classification, confidence, reasoning{", week_key" if week_key else ""})
+                WHERE e.id = v.id{week_filter}
+                RETURNING e.week_key, e.agent_name
+            """, rows, template=f"(%s, %s, %s::real, %s{', %s' if week_key else ''})", page_size=page_size, fetch=True)
+            _refresh_agent_week_stats(cur, {tuple(pair) for pair in updated})
+            return len(updated)
+        sql = "UPDATE events SET classification=?, confidence=?, ai_reasoning=? WHERE id=?"
+        params = [(cls, conf, reason, event_id) for event_id, cls, conf, reason in rows]
+        if week_key:
+            sql += " AND week_key=?"
+            params = [p + (week_key,) for p in params]
+        cur.executemany(sql, params)
+        updated = cur.rowcount
+        pairs = set()
+        ids = [row[0] for row in rows]
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i+500]
+            cur.execute(f"SELECT DISTINCT week_key, agent_name FROM events WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            pairs.update(tuple(pair) for pair in cur.fetchall())
+        _refresh_agent_week_stats(cur, pairs)
+        return updated
 
 def set_override(event_id, new_classification):
-    conn = get_db()
-    cur = conn.cursor()
-    ph = "%s" if _is_pg() else "?"
-    cur.execute(f"SELECT * FROM events WHERE id={ph}", (event_id,))
-    row = cur.fetchone()
-    if row:
-        event = dict(zip([d[0] for d in cur.description], row)) if not isinstance(row, dict) else row
-        cur.execute(f"UPDATE events SET override={ph} WHERE id={ph}", (new_classification, event_id))
-        cur.execute(f"INSERT INTO overrides (event_title, original_classification, corrected_classification) VALUES ({ph},{ph},{ph})",
-                    (event['title'], event['classification'], new_classification))
-        conn.commit()
-    conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        cur.execute(f"SELECT * FROM events WHERE id={ph}", (event_id,))
+        row = cur.fetchone()
+        if row:
+            event = dict(zip([d[0] for d in cur.description], row)) if not isinstance(row, dict) else row
+            cur.execute(f"UPDATE events SET override={ph} WHERE id={ph}", (new_classification, event_id))
+            cur.execute(f"INSERT INTO overrides (event_title, original_classification, corrected_classification) VALUES ({ph},{ph},{ph})",
+                        (event['title'], event['classification'], new_classification))
+            _refresh_agent_week_stats(cur, {(event['week_key'], event['agent_name'])})
+            # The learned examples feed the prompt; the title cache is keyed on this
+            # counter, so answers from the old prompt stop being looked up
+            _bump_counter(cur, "overrides_version")
 
-def get_learned_examples(limit=20):
-    conn = get_db()
-    cur = conn.cursor()
+def _bump_counter(cur, key):
     ph = "%s" if _is_pg() else "?"
-    cur.execute(f"SELECT event_title, corrected_classification FROM overrides ORDER BY created_at DESC LIMIT {ph}", (limit,))
-    rows = _fetchall_dicts(cur)
-    conn.close()
-    return rows
+    cur.execute(f"""
+        INSERT INTO app_meta (key, value) VALUES ({ph}, 1)
+        ON CONFLICT(key) DO UPDATE SET value = app_meta.value + 1
+    """, (key,))
 
-def get_agent_stats(week_key):
-    conn = get_db()
-    cur = conn.cursor()
+def get_counter(key):
+    """Current value of an app_meta counter (0 if it has never been bumped)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        cur.execute(f"SELECT value FROM app_meta WHERE key={ph}", (key,))
+        row = cur.fetchone()
+        return row[0] if row else 0
+
+def get_cached_classifications(title_keys, version):
+    """Look up cached results for normalized titles. Returns {title_key: result} and counts the hits."""
+    keys = sorted(set(title_keys))
+    found = {}
+    if not keys:
+        return found
     ph = "%s" if _is_pg() else "?"
-    cur.execute(f"""
-        SELECT agent_name,
-            COUNT(*) as total,
-            SUM(CASE WHEN COALESCE(override, classification) = 'sales' THEN 1 ELSE 0 END) as sales,
-            SUM(CASE WHEN classification IS NULL THEN 1 ELSE 0 END) as unclassified
-        FROM events WHERE week_key={ph} GROUP BY agent_name ORDER BY agent_name
-    """, (week_key,))
-    rows = _fetchall_dicts(cur)
-    conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i+500]
+            marks = ",".join([ph] * len(chunk))
+            cur.execute(f"""
+                SELECT title_key, classification, confidence, reasoning FROM classification_cache
+                WHERE version={ph} AND title_key IN ({marks})
+            """, (version, *chunk))
+            for row in _fetchall_dicts(cur):
+                found[row.pop("title_key")] = row
+        hit_keys = sorted(found)
+        for i in range(0, len(hit_keys), 500):
+            chunk = hit_keys[i:i+500]
+            marks = ",".join([ph] * len(chunk))
+            cur.execute(f"UPDATE classification_cache SET hits = hits + 1 WHERE version={ph} AND title_key IN ({marks})",
+                        (version, *chunk))
+    return found
+
+def store_cached_classifications(entries, version):
+    """Upsert (title_key, classification, confidence, reasoning) tuples into the title cache."""
+    rows = {entry[0]: (entry[0], version, *entry[1:]) for entry in entries}
+    if not rows:
+        return
+    values = "%s" if _is_pg() else "(?, ?, ?, ?, ?)"
+    sql = f"""
+        INSERT INTO classification_cache (title_key, version, classification, confidence, reasoning)
+        VALUES {values}
+        ON CONFLICT(title_key, version) DO UPDATE SET classification=excluded.classification,
+            confidence=excluded.confidence, reasoning=excluded.reasoning
+    """
+    with connection() as conn:
+        cur = conn.cursor()
+        if _is_pg():
+            from psycopg2.extras import execute_values
+            execute_values(cur, sql, list(rows.values()))
+        else:
+            cur.executemany(sql, list(rows.values()))
+
+def classification_cache_size():
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM classification_cache")
+        return cur.fetchone()[0]
+
+# --- Classification jobs ----------------------------------------------------
+# One row per queued week. Workers claim jobs, heartbeat while they run and
+# record last_id so a job taken over after a crash resumes where it stopped.
+
+def enqueue_classification_job(week_key, reclassify=False):
+    """Queue a week unless it already has a queued or running job. Returns (job, created)."""
+    ph = "%s" if _is_pg() else "?"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            INSERT INTO classification_jobs (week_key, reclassify, status, created_at)
+            VALUES ({ph}, {ph}, 'queued', {ph})
+            ON CONFLICT (week_key) WHERE status IN ('queued', 'running') DO NOTHING
+        """, (week_key, int(bool(reclassify)), time.time()))
+        created = cur.rowcount == 1
+        if not created and reclassify:
+            # A queued plain job is widened; a running one finishes as it started
+            cur.execute(f"UPDATE classification_jobs SET reclassify=1 WHERE week_key={ph} AND status='queued'", (week_key,))
+        cur.execute(f"SELECT * FROM classification_jobs WHERE week_key={ph} AND status IN ('queued', 'running')", (week_key,))
+        job = _fetchall_dicts(cur)[0]
+    return job, created
+
+def claim_classification_job(worker, stale_after=120):
+    """Take the oldest queued job, or a running one whose worker stopped heartbeating.
+
+    Returns the claimed job, or None when there is nothing to do.
+    """
+    ph = "%s" if _is_pg() else "?"
+    now = time.time()
+    pick = f"""
+        SELECT id FROM classification_jobs
+        WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < {ph})
+        ORDER BY created_at, id LIMIT 1
+    """
+    if _is_pg():
+        pick += " FOR UPDATE SKIP LOCKED"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            UPDATE classification_jobs
+            SET status='running', worker={ph}, heartbeat_at={ph}, started_at=COALESCE(started_at, {ph}),
+                attempts=attempts + 1
+            WHERE id = ({pick})
+            RETURNING *
+        """, (worker, now, now, now - stale_after))
+        rows = _fetchall_dicts(cur)
+    return rows[0] if rows else None
+
+def heartbeat_classification_job(job_id, worker, **fields):
+    """Record progress (done, total, current, last_id) and refresh the heartbeat.
+
+    Returns False when the job is no longer this worker's, which means stop.
+    """
+    ph = "%s" if _is_pg() else "?"
+    fields = {k: v for k, v in fields.items() if k in ("done", "total", "current", "last_id") and v is not None}
+    sets = ", ".join([f"heartbeat_at={ph}"] + [f"{k}={ph}" for k in fields])
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"UPDATE classification_jobs SET {sets} WHERE id={ph} AND worker={ph} AND status='running'",
+                    (time.time(), *fields.values(), job_id, worker))
+        return cur.rowcount == 1
+
+def finish_classification_job(job_id, worker, status="done", error=None, current=None):
+    ph = "%s" if _is_pg() else "?"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            UPDATE classification_jobs SET status={ph}, error={ph}, current=COALESCE({ph}, current), finished_at={ph}
+            WHERE id={ph} AND worker={ph} AND status='running'
+        """, (status, error, current, time.time(), job_id, worker))
+        return cur.rowcount == 1
+
+def get_classification_job(week_key):
+    """The week's active job if it has one, else its most recent job, else None."""
+    ph = "%s" if _is_pg() else "?"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT * FROM classification_jobs WHERE week_key={ph}
+            ORDER BY CASE WHEN status IN ('queued', 'running') THEN 0 ELSE 1 END, id DESC LIMIT 1
+        """, (week_key,))
+        rows = _fetchall_dicts(cur)
+    return rows[0] if rows else None
+
+def list_classification_jobs(limit=20):
+    """Active jobs first (in queue order), then the most recently created."""
+    ph = "%s" if _is_pg() else "?"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT * FROM classification_jobs
+            ORDER BY CASE WHEN status IN ('queued', 'running') THEN 0 ELSE 1 END,
+                     CASE WHEN status IN ('queued', 'running') THEN id ELSE -id END
+            LIMIT {ph}
+        """, (limit,))
+        return _fetchall_dicts(cur)
+
+# --- OpenAI Batch API submissions -------------------------------------------
+
+def record_openai_batch(batch_id, weeks, status, input_file_id, requests, event_count, overrides_version=None):
+    ph = "%s" if _is_pg() else "?"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            INSERT INTO openai_batches (batch_id, weeks, status, input_file_id, request_count, event_count, requests,
+                                        overrides_version, created_at)
+            VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+        """, (batch_id, json.dumps(weeks), status, input_file_id, len(requests), event_count, json.dumps(requests),
+              overrides_version, time.time()))
+
+def update_openai_batch(batch_id, **fields):
+    allowed = ("status", "output_file_id", "error_file_id", "saved", "applied", "error", "completed_at")
+    fields = {k: v for k, v in fields.items() if k in allowed}
+    if not fields:
+        return
+    ph = "%s" if _is_pg() else "?"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"UPDATE openai_batches SET {', '.join(f'{k}={ph}' for k in fields)} WHERE batch_id={ph}",
+                    (*fields.values(), batch_id))
+
+def get_openai_batches(pending_only=False, with_requests=False):
+    """Submitted batches, newest first. pending_only skips ones whose results were already applied."""
+    cols = "*" if with_requests else ("batch_id, weeks, status, input_file_id, output_file_id, error_file_id, "
+                                      "request_count, event_count, saved, applied, error, overrides_version, "
+                                      "created_at, completed_at")
+    where = "WHERE applied = 0" if pending_only else ""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT {cols} FROM openai_batches {where} ORDER BY created_at DESC")
+        rows = _fetchall_dicts(cur)
+    for row in rows:
+        row["weeks"] = json.loads(row["weeks"])
+        if with_requests:
+            row["requests"] = json.loads(row["requests"])
     return rows
 
-init_db()
+def get_learned_examples(limit=20):
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        cur.execute(f"SELECT event_title, corrected_classification FROM overrides ORDER BY created_at DESC LIMIT {ph}", (limit,))
+        return _fetchall_dicts(cur)
+
+def get_override_labels():
+    """Latest manager correction per event title, as [(title, classification)]."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT event_title, corrected_classification FROM overrides ORDER BY id")
+        latest = {}
+        for title, classification in cur.fetchall():
+            latest[title] = classification
+        return list(latest.items())
+
+def get_labelled_titles():
+    """Every live event that has a label, for training the local title model and for bench_classify.py."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, agent_name, title, classification, override, ai_reasoning FROM events
+            WHERE deleted_at IS NULL AND (classification IS NOT NULL OR override IS NOT NULL)
+        """)
+        return _fetchall_dicts(cur)
+
+def get_agent_stats(week_key):
+    """Per-agent counts for a week, read from the agent_week_stats rollup."""
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        cur.execute(f"""
+            SELECT agent_name, total, sales, not_sales, unclassified, overridden
+            FROM agent_week_stats WHERE week_key={ph} AND total > 0 ORDER BY agent_name
+        """, (week_key,))
+        return _fetchall_dicts(cur)
+
+def get_week_status(week_key):
+    """Week totals summed from the rollup: total, classified, sales, unclassified."""
+    with connection() as conn:
+        cur = conn.cursor()
+        ph = "%s" if _is_pg() else "?"
+        cur.execute(f"""
+            SELECT COALESCE(SUM(total), 0), COALESCE(SUM(sales), 0), COALESCE(SUM(unclassified), 0)
+            FROM agent_week_stats WHERE week_key={ph}
+        """, (week_key,))
+        total, sales, unclassified = cur.fetchone()
+    return {"total": total, "classified": total - unclassified, "sales": sales, "unclassified": unclassified}
+
+if os.environ.get("DB_AUTO_MIGRATE", "1") == "1":
+    migrate()
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        applied = migrate()
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date", flush=True)
+    elif len(sys.argv) >= 2 and sys.argv[1] == "rebuild-stats":
+        week = sys.argv[2] if len(sys.argv) > 2 else None
+        rebuild_agent_week_stats(week)
+        print(f"Rebuilt agent_week_stats for {week or 'all weeks'}", flush=True)
+    else:
+        print("Usage: python database.py migrate | rebuild-stats [week_key]", flush=True)
+        sys.exit(1)
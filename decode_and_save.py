@@ -1,7 +1,8 @@
 import base64, json
+import event_cache
 
 b64 = open('w01_b64.txt').read().strip()
 data = json.loads(base64.b64decode(b64).decode('utf-8'))
-with open('events_cache/2026-W01.json', 'w') as f:
-    json.dump(data, f)
-print(f"Saved {len(data)} events to events_cache/2026-W01.json")
+events = data.get('events', data) if isinstance(data, dict) else data
+event_cache.write_week('2026-W01', events)
+print(f"Saved {len(events)} events to events_cache for 2026-W01")
@@ -0,0 +1,192 @@
+"""The events_cache directory: one compact file per week plus a manifest.
+
+    events_cache/<week>.jsonl.gz   gzip, one JSON header line then one JSON array per event
+    events_cache/manifest.json     per week: count, sha256 of the rows, fetched_at, bytes
+
+Rows hold the FIELDS values in order (trailing empty values dropped), so no key
+is repeated per event. Files are read as a stream, row by row. Whether a week is
+cached, and how big it is, is answered from the manifest without opening the file.
+
+Older <week>.json files (full-key dicts, {"events": [...]} wrappers, the
+abbreviated a/t/s/n/d/l form or database rows) are converted on first use.
+
+    python event_cache.py list | show WEEK | convert | reindex
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+import normalize
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "events_cache")
+FORMAT = "krs-events"
+VERSION = 1
+FIELDS = ["agent", "title", "start", "end", "description", "location", "classification", "confidence", "reasoning"]
+# Optional fields are left out of loaded events when empty; the rest always come back as strings
+OPTIONAL = {"classification", "confidence", "reasoning"}
+# Names each field has gone by in older cache files (the shared table in normalize.py)
+COLUMNS = {"agent": "agent_name", "title": "title", "start": "start_time", "end": "end_time",
+           "description": "description", "location": "location", "classification": "classification",
+           "confidence": "confidence", "reasoning": "ai_reasoning"}
+ALIASES = {field: normalize.FIELD_ALIASES[column] for field, column in COLUMNS.items()}
+
+_manifest_lock = threading.Lock()
+
+def _path(week_key, cache_dir):
+    return os.path.join(cache_dir, f"{week_key}.jsonl.gz")
+
+def _legacy_path(week_key, cache_dir):
+    return os.path.join(cache_dir, f"{week_key}.json")
+
+def _manifest_path(cache_dir):
+    return os.path.join(cache_dir, "manifest.json")
+
+def normalize_entry(raw):
+    """One event from any of the old cache shapes as {field: value}."""
+    event = {}
+    for field in FIELDS:
+        value = next((raw[k] for k in ALIASES[field] if raw.get(k) not in (None, "")), None)
+        # Sheet exports sometimes wrap values in single quotes
+        if isinstance(value, str) and len(value) >= 2 and value[0] == value[-1] == "'":
+            value = value[1:-1]
+        if value is not None or field not in OPTIONAL:
+            event[field] = "" if value is None else value
+    return event
+
+def _row(event):
+    row = [event.get(f, None if f in OPTIONAL else "") for f in FIELDS]
+    while row and row[-1] in (None, ""):
+        row.pop()
+    return row
+
+def load_manifest(cache_dir=CACHE_DIR):
+    try:
+        with open(_manifest_path(cache_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"format": FORMAT, "version": VERSION, "weeks": {}}
+
+def _update_manifest(cache_dir, week_key, entry):
+    with _manifest_lock:
+        manifest = load_manifest(cache_dir)
+        manifest["weeks"][week_key] = entry
+        tmp = _manifest_path(cache_dir) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, _manifest_path(cache_dir))
+
+def write_week(week_key, events, fetched_at=None, cache_dir=CACHE_DIR):
+    """Store a week's events (any old shape is accepted) and record it in the manifest. Returns the entry."""
+    os.makedirs(cache_dir, exist_ok=True)
+    lines = [json.dumps(_row(normalize_entry(e)), ensure_ascii=False, separators=(",", ":")) for e in events]
+    digest = hashlib.sha256("\n".join(lines).encode()).hexdigest()
+    fetched_at = fetched_at or time.strftime("%Y-%m-%dT%H:%M:%S")
+    header = {"format": FORMAT, "version": VERSION, "week": week_key, "fields": FIELDS, "count": len(lines),
+              "sha256": digest, "fetched_at": fetched_at}
+    path = _path(week_key, cache_dir)
+    tmp = path + ".tmp"
+    # mtime=0 keeps identical content byte-identical on disk
+    with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write((json.dumps(header) + "\n").encode())
+        for line in lines:
+            f.write(line.encode() + b"\n")
+    os.replace(tmp, path)
+    entry = {"count": len(lines), "sha256": digest, "fetched_at": fetched_at, "bytes": os.path.getsize(path)}
+    _update_manifest(cache_dir, week_key, entry)
+    return entry
+
+def _read_legacy(week_key, cache_dir):
+    with open(_legacy_path(week_key, cache_dir)) as f:
+        data = json.load(f)
+    return data.get("events", []) if isinstance(data, dict) else data
+
+def convert_week(week_key, cache_dir=CACHE_DIR):
+    """Rewrite an old <week>.json in the compact format; the old file is removed. Returns the manifest entry."""
+    legacy = _legacy_path(week_key, cache_dir)
+    fetched_at = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(os.path.getmtime(legacy)))
+    entry = write_week(week_key, _read_legacy(week_key, cache_dir), fetched_at, cache_dir)
+    os.remove(legacy)
+    print(f"[cache] Converted {week_key}: {entry['count']} events, {entry['bytes']:,} bytes", flush=True)
+    return entry
+
+def week_info(week_key, cache_dir=CACHE_DIR):
+    """The manifest entry for a week ({count, sha256, fetched_at, bytes}), or None if it is not cached."""
+    entry = load_manifest(cache_dir)["weeks"].get(week_key)
+    if entry and os.path.exists(_path(week_key, cache_dir)):
+        return entry
+    if os.path.exists(_legacy_path(week_key, cache_dir)):
+        return convert_week(week_key, cache_dir)
+    return None
+
+def has_week(week_key, min_events=1, cache_dir=CACHE_DIR):
+    entry = week_info(week_key, cache_dir)
+    return bool(entry) and entry["count"] >= min_events
+
+def _open(week_key, cache_dir):
+    f = gzip.open(_path(week_key, cache_dir), "rt", encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("format") != FORMAT or header.get("version") != VERSION:
+        f.close()
+        raise ValueError(f"{week_key}: not a {FORMAT} v{VERSION} file")
+    return f, header
+
+def iter_week(week_key, cache_dir=CACHE_DIR):
+    """Yield a week's events one at a time as dicts. Nothing is read until the first event is asked for."""
+    if week_info(week_key, cache_dir) is None:
+        return
+    f, header = _open(week_key, cache_dir)
+    fields = header["fields"]
+    with f:
+        for line in f:
+            row = json.loads(line)
+            event = {}
+            for i, field in enumerate(fields):
+                value = row[i] if i < len(row) else None
+                if value not in (None, ""):
+                    event[field] = value
+                elif field not in OPTIONAL:
+                    event[field] = ""
+            yield event
+
+def load_week(week_key, cache_dir=CACHE_DIR):
+    return list(iter_week(week_key, cache_dir))
+
+def convert_all(cache_dir=CACHE_DIR):
+    """Convert every old <week>.json in the directory. Returns the weeks converted."""
+    weeks = sorted(name[:-5] for name in os.listdir(cache_dir)
+                   if name.endswith(".json") and name != "manifest.json" and "-W" in name)
+    for week_key in weeks:
+        convert_week(week_key, cache_dir)
+    return weeks
+
+def reindex(cache_dir=CACHE_DIR):
+    """Rebuild the manifest from the week files' headers."""
+    for name in sorted(os.listdir(cache_dir)):
+        if name.endswith(".jsonl.gz"):
+            week_key = name[:-len(".jsonl.gz")]
+            f, header = _open(week_key, cache_dir)
+            f.close()
+            _update_manifest(cache_dir, week_key, {"count": header["count"], "sha256": header["sha256"],
+                                                   "fetched_at": header["fetched_at"],
+                                                   "bytes": os.path.getsize(_path(week_key, cache_dir))})
+    return load_manifest(cache_dir)
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if cmd == "convert":
+        print(f"Converted {len(convert_all())} weeks", flush=True)
+    elif cmd == "reindex":
+        print(f"Indexed {len(reindex()['weeks'])} weeks", flush=True)
+    elif cmd == "show" and len(sys.argv) > 2:
+        for event in iter_week(sys.argv[2]):
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+    elif cmd == "list":
+        for week_key, entry in sorted(load_manifest()["weeks"].items()):
+            print(f"{week_key}  {entry['count']:>6} events  {entry['bytes']:>9,} bytes  fetched {entry['fetched_at']}  "
+                  f"{entry['sha256'][:12]}", flush=True)
+    else:
+        sys.exit("usage: python event_cache.py list | show WEEK | convert | reindex")
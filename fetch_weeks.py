@@ -1,5 +1,6 @@
 """Fetch W04-W07 from Apps Script via Playwright CDP, save to cache."""
 import json, asyncio
+import event_cache
 
 CDP_URL = 'http://127.0.0.1:18800'
 SCRIPT = 'https://script.google.com/a/macros/krs.insure/s/AKfycbwN46cLo1aqtgwYz6CBAig_WOaBM2x1MTlYkcDbuXrejwAFfRfWgXazG_Qo3Yn0s2Ekzw/exec'
@@ -32,10 +33,8 @@ async def main():
                 print(f'  {wk}: JSON parse failed: {text[:200]}', flush=True)
                 continue
             
-            compact = [{'a':e.get('agent',''),'t':e.get('title',''),'s':e.get('start',''),'n':e.get('end',''),'d':(e.get('description','')or'')[:100],'l':(e.get('location','')or'')[:100]} for e in events]
-            with open(f'events_cache/{wk}.json', 'w') as f:
-                json.dump(compact, f)
-            print(f'  {wk}: saved {len(compact)} events', flush=True)
+            entry = event_cache.write_week(wk, events)
+            print(f'  {wk}: saved {entry["count"]} events', flush=True)
         
         await page.close()
     print('Done fetching!', flush=True)
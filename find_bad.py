@@ -1,4 +1,5 @@
-import json, requests
+import requests
+import event_cache
 
 API = 'https://krs-calendar-tracker.onrender.com'
 KEY = 'krs-sync-2026-x7qm9p'
@@ -8,16 +9,15 @@ def clean(v):
         return v[1:-1]
     return v
 
-with open('events_cache/2026-W08.json') as f:
-    data = json.load(f)
+data = event_cache.load_week('2026-W08')
 
 # Test first 50 one by one
 for i, e in enumerate(data[:50]):
     ev = {
-        'agent': clean(e['agent_name']),
+        'agent': clean(e['agent']),
         'title': clean(e['title']),
-        'start': clean(e['start_time']),
-        'end': clean(e.get('end_time', '')),
+        'start': clean(e['start']),
+        'end': clean(e.get('end', '')),
         'description': clean(e.get('description', '')),
         'location': clean(e.get('location', ''))
     }
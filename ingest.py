@@ -0,0 +1,101 @@
+"""Streaming NDJSON ingest: any number of weeks of events in one request.
+
+    POST /api/ingest       one JSON event per line, each with its own week key:
+    {"week": "2026-W10", "agent": "Paul Vogt", "title": "...", "start": "...", "end": "...", ...}
+
+The body is read line by line as it arrives (chunked and gzip uploads are
+fine), normalized a batch at a time (normalize.normalize_many) and written with
+db.upsert_events_bulk every INGEST_BATCH events, so memory stays flat however
+large the upload is. A line without a week key gets the ISO week of its start
+date. Bad lines are counted and reported, not fatal.
+
+ingest_client.py is the command-line side: it streams cached weeks here.
+"""
+import json
+import os
+import time
+
+import database as db
+import normalize
+
+INGEST_BATCH = int(os.environ.get("INGEST_BATCH", "2000"))
+# Decompressed size cap for gzip/zstd uploads; memory use doesn't grow with it
+INGEST_MAX_BYTES = int(os.environ.get("INGEST_MAX_BYTES", str(2 * 1024 ** 3)))
+# Longest accepted line; an event is a few KB at most
+MAX_LINE_BYTES = 256 * 1024
+MAX_REPORTED_ERRORS = 20
+
+def _lines(stream):
+    """(line_number, bytes) for each line of a binary stream; overlong lines come back as None."""
+    number = 0
+    while True:
+        line = stream.readline(MAX_LINE_BYTES + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > MAX_LINE_BYTES and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(MAX_LINE_BYTES)
+            yield number, None
+        else:
+            yield number, line
+
+def ingest_stream(stream, batch_size=INGEST_BATCH):
+    """Upsert the NDJSON events read from a binary stream. Returns a summary with per-week counts."""
+    t0 = time.perf_counter()
+    summary = {"lines": 0, "synced": 0, "inserted": 0, "updated": 0, "unchanged": 0, "classified": 0,
+               "skipped": 0, "batches": 0, "weeks": {}, "errors": []}
+    raw, numbers = [], []
+
+    def error(number, message):
+        summary["skipped"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"line": number, "error": message})
+
+    def flush():
+        errors = []
+        rows = normalize.normalize_many(raw, default_confidence=0.8, errors=errors)
+        for index, message in errors:
+            error(numbers[index], message)
+        for wk, events in normalize.group_by_week(rows).items():
+            upserted = db.upsert_events_bulk(events)
+            classified = db.update_classifications_bulk(
+                [ev for ev in events if "classification" in ev], week_key=wk)
+            counts = summary["weeks"].setdefault(wk, {"synced": 0, "inserted": 0, "updated": 0,
+                                                      "unchanged": 0, "classified": 0})
+            counts["synced"] += len(events)
+            counts["classified"] += classified
+            summary["synced"] += len(events)
+            summary["classified"] += classified
+            for key in ("inserted", "updated", "unchanged"):
+                counts[key] += upserted[key]
+                summary[key] += upserted[key]
+        summary["batches"] += 1
+        raw.clear()
+        numbers.clear()
+
+    for number, line in _lines(stream):
+        summary["lines"] += 1
+        if line is None:
+            error(number, f"line longer than {MAX_LINE_BYTES:,} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            ev = json.loads(line)
+            if not isinstance(ev, dict):
+                raise ValueError("not a JSON object")
+        except ValueError as e:
+            error(number, str(e))
+            continue
+        raw.append(ev)
+        numbers.append(number)
+        if len(raw) >= batch_size:
+            flush()
+    if raw:
+        flush()
+    summary["seconds"] = round(time.perf_counter() - t0, 2)
+    print(f"[ingest] {summary['synced']} events in {len(summary['weeks'])} weeks from {summary['lines']} lines "
+          f"({summary['inserted']} new, {summary['updated']} changed, {summary['skipped']} skipped) "
+          f"in {summary['batches']} batches, {summary['seconds']}s", flush=True)
+    return summary
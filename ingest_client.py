@@ -0,0 +1,70 @@
+"""Stream cached weeks to the deployed app's /api/ingest in a single request.
+
+    python ingest_client.py 2026-W01 [2026-W13] [--api URL] [--no-classify]
+
+The weeks are read from events_cache and sent as gzip-compressed NDJSON, a
+chunk at a time, so neither side holds the whole upload in memory. Nothing
+here touches the database; ingest.py is the server side.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import calendar_source
+import event_cache
+from backfill_engine import DEFAULT_API, sync_api_key
+
+def _ndjson_gzip(weeks, cache_dir):
+    """The cached weeks as gzip-compressed NDJSON, produced a chunk at a time."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    out = []
+    for wk in weeks:
+        for ev in event_cache.iter_week(wk, cache_dir):
+            out.append(json.dumps({"week": wk, **ev}, ensure_ascii=False))
+            if len(out) >= 500:
+                yield gz.compress(("\n".join(out) + "\n").encode())
+                out = []
+    if out:
+        yield gz.compress(("\n".join(out) + "\n").encode())
+    yield gz.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream cached weeks to /api/ingest in one request")
+    parser.add_argument("start")
+    parser.add_argument("end", nargs="?")
+    parser.add_argument("--no-classify", action="store_true")
+    parser.add_argument("--api", default=os.environ.get("BACKFILL_API_URL", DEFAULT_API))
+    parser.add_argument("--cache-dir", default=event_cache.CACHE_DIR)
+    args = parser.parse_args()
+
+    weeks = [wk for wk in calendar_source.week_range(args.start, args.end)
+             if event_cache.week_info(wk, args.cache_dir)]
+    if not weeks:
+        sys.exit("No cached weeks in that range")
+    headers = {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+    key = sync_api_key()
+    if key:
+        headers["X-API-Key"] = key
+    t0 = time.perf_counter()
+    r = requests.post(f"{args.api.rstrip('/')}/api/ingest", params={"classify": "0" if args.no_classify else "1"},
+                      data=_ndjson_gzip(weeks, args.cache_dir), headers=headers, timeout=1800)
+    if r.status_code >= 400:
+        sys.exit(f"HTTP {r.status_code}: {r.text[:500]}")
+    result = r.json()
+    for wk, counts in result["weeks"].items():
+        print(f"  {wk}: {counts}", flush=True)
+    for err in result["errors"]:
+        print(f"  line {err['line']}: {err['error']}", flush=True)
+    print(f"Ingested {result['synced']} events in {len(result['weeks'])} weeks "
+          f"({result['inserted']} new, {result['updated']} changed), queued {len(result.get('queued', []))}, "
+          f"in {time.perf_counter() - t0:.1f}s", flush=True)
+
+if __name__ == "__main__":
+    main()
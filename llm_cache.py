@@ -0,0 +1,155 @@
+"""Content-addressed cache of chat-completion responses in a single SQLite file.
+
+Keyed by a hash of the model, request parameters, system prompt and payload,
+so identical work (a retried job, a repeated backfill) is answered from disk.
+Reclassify jobs skip the lookup and only store their fresh answers. Bounded by
+entry count with least-recently-used eviction.
+
+Modes (LLM_CACHE_MODE, or "llm_cache": {"mode": ...} in config.json):
+    off        never read or write
+    readwrite  serve hits, store misses (default)
+    record     always call the API and store the answer
+    replay     serve hits, raise LLMCacheMiss on a miss; no network needed
+
+    python llm_cache.py stats | clear
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+MODES = ("off", "readwrite", "record", "replay")
+# Eviction runs every this many writes rather than on each one
+EVICT_EVERY = 100
+
+_local = threading.local()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+_stats_lock = threading.Lock()
+_writes = {"since_evict": 0}
+
+class LLMCacheMiss(RuntimeError):
+    """Replay mode found no recorded response for a request."""
+
+def load_cache_config():
+    config_path = os.path.join(os.path.dirname(__file__), "config.json")
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            config = json.load(f).get("llm_cache", {})
+    mode = os.environ.get("LLM_CACHE_MODE", config.get("mode", "readwrite"))
+    return {
+        "mode": mode if mode in MODES else "readwrite",
+        "path": os.environ.get("LLM_CACHE_PATH", config.get("path", os.path.join(os.path.dirname(__file__), "llm_cache.db"))),
+        "max_entries": int(os.environ.get("LLM_CACHE_MAX_ENTRIES", config.get("max_entries", 50000))),
+    }
+
+_config = load_cache_config()
+
+def mode():
+    return _config["mode"]
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != _config["path"]:
+        conn = sqlite3.connect(_config["path"], timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+        conn.commit()
+        _local.conn, _local.path = conn, _config["path"]
+    return conn
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+def cache_key(model, system_prompt, payload, **params):
+    """sha256 over everything that shapes the answer."""
+    h = hashlib.sha256()
+    for part in (model, json.dumps(params, sort_keys=True), system_prompt, payload):
+        h.update(part.encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def get(key):
+    """Cached response content, or None. In replay mode a miss raises LLMCacheMiss."""
+    if _config["mode"] in ("off", "record"):
+        return None
+    conn = _conn()
+    row = conn.execute("SELECT content FROM responses WHERE key=?", (key,)).fetchone()
+    if row is None:
+        _bump("misses")
+        if _config["mode"] == "replay":
+            raise LLMCacheMiss(f"no recorded response for {key[:12]} (LLM_CACHE_MODE=replay)")
+        return None
+    conn.execute("UPDATE responses SET last_used=?, hits=hits+1 WHERE key=?", (time.time(), key))
+    conn.commit()
+    _bump("hits")
+    return row[0]
+
+def put(key, model, content):
+    if _config["mode"] in ("off", "replay"):
+        return
+    conn = _conn()
+    now = time.time()
+    conn.execute("""
+        INSERT INTO responses (key, model, content, created_at, last_used) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET content=excluded.content, last_used=excluded.last_used
+    """, (key, model, content, now, now))
+    conn.commit()
+    with _stats_lock:
+        _stats["writes"] += 1
+        _writes["since_evict"] += 1
+        due = _writes["since_evict"] >= EVICT_EVERY
+        if due:
+            _writes["since_evict"] = 0
+    if due:
+        evict()
+
+def evict():
+    """Drop the least recently used entries beyond max_entries. Returns how many went."""
+    conn = _conn()
+    excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - _config["max_entries"]
+    if excess <= 0:
+        return 0
+    conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,))
+    conn.commit()
+    _bump("evicted", excess)
+    return excess
+
+def clear():
+    conn = _conn()
+    conn.execute("DELETE FROM responses")
+    conn.commit()
+
+def cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["mode"] = _config["mode"]
+    stats["max_entries"] = _config["max_entries"]
+    stats["entries"] = _conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0] if _config["mode"] != "off" else 0
+    return stats
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if cmd == "clear":
+        clear()
+        print(f"Cleared {_config['path']}", flush=True)
+    elif cmd == "stats":
+        print(json.dumps(cache_stats(), indent=2), flush=True)
+    else:
+        sys.exit("usage: python llm_cache.py stats | clear")
@@ -0,0 +1,261 @@
+"""Local stand-in for the OpenAI chat-completions endpoint, for offline runs and benchmarks.
+
+    python mock_openai.py --port 8089 --latency 0.5 --rate-limit-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=mock python ...
+
+Answers every event in the request (verbose or compact id/t/a payloads) from a
+keyword heuristic, or from a title -> label map when one is supplied. Latency,
+429s and 500s can be injected. GET /stats reports request, token and
+concurrency counters.
+
+Also stubs the Batch API: POST /files (multipart upload), GET /files/{id}/content,
+POST /batches and GET /batches/{id}. A batch stays in_progress for
+`batch_delay` seconds, then its requests are answered like chat completions
+and written to an output file.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SALES_HINT = re.compile(r"review|consult|medicare|annuit|appt|appointment|policy|client|enroll", re.I)
+
+class MockState:
+    def __init__(self, latency=0.2, jitter=0.0, rate_limit_rate=0.0, error_rate=0.0, labels=None, seed=None,
+                 batch_delay=1.0):
+        self.latency = latency
+        self.batch_delay = batch_delay
+        self.files = {}
+        self.batches = {}
+        self.ids = itertools.count(1)
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.labels = labels or {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0,
+                          "prompt_tokens": 0, "completion_tokens": 0}
+
+    def bump(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def label(self, title):
+        if title in self.labels:
+            return self.labels[title]
+        return "sales" if SALES_HINT.search(title or "") else "not_sales"
+
+
+def classify_payload(state, events):
+    """Build the JSON body the model would return for a list of events."""
+    results = []
+    for e in events:
+        if "t" in e:
+            label = state.label(e.get("t", ""))
+            results.append({"id": e["id"], "c": "s" if label == "sales" else "n", "r": "mock"})
+        else:
+            results.append({"id": e["id"], "classification": state.label(e.get("title", "")),
+                            "confidence": 0.9, "reasoning": "mock"})
+    return {"results": results}
+
+
+def chat_completion(state, body):
+    """Return (status, headers, payload) for one chat-completions request body."""
+    messages = body.get("messages", [])
+    prompt = "".join(m.get("content", "") for m in messages)
+    try:
+        events = json.loads(messages[-1]["content"])
+    except (IndexError, KeyError, ValueError):
+        events = []
+    content = json.dumps(classify_payload(state, events))
+    prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+    state.bump("prompt_tokens", prompt_tokens)
+    state.bump("completion_tokens", completion_tokens)
+    return 200, {}, {
+        "id": f"chatcmpl-mock-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def _file_object(state, file_id):
+    content, filename, purpose = state.files[file_id]
+    return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed"}
+
+def create_file(state, content_type, body):
+    """Store a multipart upload the way POST /files does."""
+    message = BytesParser(policy=default_policy).parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    fields, content, filename = {}, b"", "upload"
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if part.get_filename():
+            content, filename = part.get_payload(decode=True), part.get_filename()
+        else:
+            fields[name] = part.get_content().strip()
+    with state.lock:
+        file_id = f"file-mock-{next(state.ids)}"
+        state.files[file_id] = (content, filename, fields.get("purpose", "batch"))
+    return _file_object(state, file_id)
+
+def _run_batch(state, batch):
+    """Answer every request line of a batch and attach the output file."""
+    content, _, _ = state.files[batch["input_file_id"]]
+    lines = []
+    for line in content.decode().splitlines():
+        if not line.strip():
+            continue
+        req = json.loads(line)
+        _, _, payload = chat_completion(state, req["body"])
+        lines.append(json.dumps({"id": f"batch_req_{next(state.ids)}", "custom_id": req["custom_id"],
+                                 "response": {"status_code": 200, "request_id": "mock", "body": payload}, "error": None}))
+    with state.lock:
+        file_id = f"file-mock-{next(state.ids)}"
+        state.files[file_id] = ("\n".join(lines).encode(), "batch_output.jsonl", "batch_output")
+    now = int(time.time())
+    batch.update(status="completed", output_file_id=file_id, completed_at=now, finalizing_at=now,
+                 request_counts={"total": len(lines), "completed": len(lines), "failed": 0})
+
+def get_batch(state, batch_id):
+    batch = state.batches[batch_id]
+    if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= state.batch_delay:
+        _run_batch(state, batch)
+    return batch
+
+def create_batch(state, body):
+    with state.lock:
+        batch_id = f"batch_mock_{next(state.ids)}"
+    now = int(time.time())
+    state.batches[batch_id] = batch = {
+        "id": batch_id, "object": "batch", "endpoint": body.get("endpoint", "/v1/chat/completions"),
+        "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+        "status": "in_progress", "created_at": now, "in_progress_at": now, "expires_at": now + 86400,
+        "output_file_id": None, "error_file_id": None, "errors": None, "metadata": body.get("metadata"),
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+    }
+    return batch
+
+
+class Handler(BaseHTTPRequestHandler):
+    state = None
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _send_bytes(self, status, body, content_type="application/octet-stream"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.state
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/stats":
+            with state.lock:
+                return self._send(200, dict(state.stats))
+        parts = path.split("/")
+        if len(parts) >= 3 and parts[-3] == "files" and parts[-1] == "content" and parts[-2] in state.files:
+            return self._send_bytes(200, state.files[parts[-2]][0])
+        if len(parts) >= 2 and parts[-2] == "files" and parts[-1] in state.files:
+            return self._send(200, _file_object(state, parts[-1]))
+        if len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in state.batches:
+            return self._send(200, get_batch(state, parts[-1]))
+        self._send(404, {"error": {"message": f"no route {self.path}"}})
+
+    def do_POST(self):
+        state = self.state
+        if self.path.rstrip("/") == "/reset":
+            state.reset()
+            return self._send(200, {"ok": True})
+        if self.path.rstrip("/").endswith("/files"):
+            return self._send(200, create_file(state, self.headers.get("Content-Type", ""), self._body()))
+        if self.path.rstrip("/").endswith("/batches"):
+            return self._send(200, create_batch(state, json.loads(self._body() or b"{}")))
+        if not self.path.endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": f"no route {self.path}"}})
+        body = json.loads(self._body() or b"{}")
+        state.bump("requests")
+        state.bump("in_flight")
+        try:
+            time.sleep(max(0.0, state.latency + state.random.uniform(-state.jitter, state.jitter)))
+            if state.roll(state.rate_limit_rate):
+                state.bump("rate_limited")
+                return self._send(429, {"error": {"message": "Rate limit reached (mock)", "type": "requests"}},
+                                  {"retry-after-ms": "200", "x-ratelimit-remaining-requests": "0",
+                                   "x-ratelimit-reset-requests": "200ms"})
+            if state.roll(state.error_rate):
+                state.bump("errors")
+                return self._send(500, {"error": {"message": "Internal error (mock)"}})
+            status, headers, payload = chat_completion(state, body)
+            headers.update({"x-ratelimit-remaining-requests": "1000", "x-ratelimit-remaining-tokens": "1000000"})
+            self._send(status, payload, headers)
+        finally:
+            state.bump("in_flight", -1)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_server(port=0, **options):
+    """Serve in a background thread. Returns (server, base_url, state)."""
+    state = MockState(**options)
+    handler = type("BoundHandler", (Handler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--batch-delay", type=float, default=1.0)
+    args = parser.parse_args()
+    server, url, _ = start_mock_server(args.port, latency=args.latency, jitter=args.jitter,
+                                       rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+                                       batch_delay=args.batch_delay)
+    print(f"Mock OpenAI on {url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
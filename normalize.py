@@ -0,0 +1,138 @@
+"""Raw events (pushes, sheet rows, cache files, NDJSON lines) to database rows.
+
+Every ingest path goes through normalize_many(), so an event gets the same row
+whichever route it arrived by:
+
+    id          md5 of "<agent>_<start>_<title>", agent after calendar-id mapping
+    agent_name  calendar ids (x@krs.insure) mapped to names when an agents map is given
+    week_key    the week passed in, else the event's own "week"/"week_key", else the
+                ISO week of its start date
+
+Older field names (cache files, database rows, the abbreviated a/t/s form) are
+mapped through one table. They are only looked up for an event that lacks one of
+the fields every pusher sends (_PUSHED) under its current name, so the usual
+event pays nothing for them. classification, confidence and ai_reasoning are
+added for events that carry a classification.
+bench_normalize.py measures this against the per-route loops it replaced.
+"""
+import hashlib
+from datetime import date
+
+# Column -> the names it arrives under, current name first. The current name wins
+# even when its value is empty, which keeps ids what the routes always produced.
+FIELD_ALIASES = {
+    "agent_name": ("agent", "agent_name", "a"),
+    "title": ("title", "summary", "t"),
+    "start_time": ("start", "start_time", "s"),
+    "end_time": ("end", "end_time", "n"),
+    "description": ("description", "d"),
+    "location": ("location", "l"),
+    "is_all_day": ("allDay", "is_all_day"),
+    "classification": ("classification",),
+    "confidence": ("confidence",),
+    "ai_reasoning": ("reasoning", "ai_reasoning"),
+}
+# Current name -> its older names, compiled once from the table above
+_OLD_NAMES = {names[0]: names[1:] for names in FIELD_ALIASES.values()}
+# The fields the Apps Script pushes and the sheet columns always carry, with their defaults
+_PUSHED = (("allDay", False), ("agent", "Unknown"), ("title", "(No Title)"), ("start", ""),
+           ("end", ""), ("description", ""), ("location", ""))
+
+def _value(ev, name, default):
+    """A field under its current name, else its first older name present, else the default."""
+    if name in ev:
+        return ev[name]
+    for alias in _OLD_NAMES[name]:
+        if alias in ev:
+            return ev[alias]
+    return default
+
+def _pushed_fields(ev):
+    """The _PUSHED values of an event that is missing some of them under their current names."""
+    return [_value(ev, name, default) for name, default in _PUSHED]
+
+def week_key_for(start, memo=None):
+    """ISO week key of the date a start time falls on (its own offset). Raises ValueError on a bad date."""
+    day = start[:10]
+    if memo is not None and day in memo:
+        return memo[day]
+    iso = date.fromisoformat(day).isocalendar()
+    key = f"{iso[0]}-W{iso[1]:02d}"
+    if memo is not None:
+        memo[day] = key
+    return key
+
+def normalize_many(raw_events, week_key=None, agents=None, skip_all_day=False, default_confidence=None, errors=None):
+    """Database rows for a batch of raw events, in one pass.
+
+    agents maps calendar ids to names. All-day events are dropped with
+    skip_all_day. Events whose week can't be worked out are dropped; when an
+    errors list is given, (index, message) is appended for each.
+    """
+    rows = []
+    append = rows.append
+    memo = {}
+    md5 = hashlib.md5
+    # Events skipped so far, so an error is reported at its index in raw_events
+    dropped = 0
+    for ev in raw_events:
+        try:
+            all_day = ev["allDay"]
+            agent = ev["agent"]
+            title = ev["title"]
+            start = ev["start"]
+            end = ev["end"]
+            description = ev["description"]
+            location = ev["location"]
+        except KeyError:
+            all_day, agent, title, start, end, description, location = _pushed_fields(ev)
+        if all_day is not False:
+            if isinstance(all_day, str):
+                # Pushes send a bool, sheet exports say TRUE / FALSE
+                all_day = all_day.upper() == "TRUE"
+            if skip_all_day and all_day:
+                dropped += 1
+                continue
+        if agents:
+            agent = agents.get(agent, agent)
+        wk = week_key or ev.get("week") or ev.get("week_key")
+        if not wk:
+            try:
+                if not start:
+                    raise ValueError("no week key and no start time")
+                wk = week_key_for(start, memo)
+            except ValueError as e:
+                if errors is not None:
+                    errors.append((len(rows) + dropped, str(e)))
+                dropped += 1
+                continue
+        row = {
+            "id": md5(f"{agent}_{start}_{title}".encode()).hexdigest(),
+            "agent_name": agent,
+            "title": title,
+            "start_time": start,
+            "end_time": end,
+            "description": description,
+            "location": location,
+            "week_key": wk,
+            "is_all_day": all_day,
+        }
+        classification = ev.get("classification")
+        if classification:
+            confidence = ev.get("confidence")
+            row["classification"] = classification
+            row["confidence"] = default_confidence if confidence is None else confidence
+            row["ai_reasoning"] = _value(ev, "reasoning", "")
+        append(row)
+    return rows
+
+def group_by_week(rows):
+    """{week_key: [row, ...]} in first-seen order."""
+    weeks = {}
+    for row in rows:
+        wk = row["week_key"]
+        if wk in weeks:
+            weeks[wk].append(row)
+        else:
+            weeks[wk] = [row]
+    return weeks
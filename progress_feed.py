@@ -0,0 +1,95 @@
+"""Shared per-week progress snapshots behind /api/classify/progress and the SSE stream.
+
+A week's snapshot (job progress plus rollup counts) is read from the database
+at most once per STREAM_POLL_SECONDS per process, however many dashboards are
+watching; every poller and stream in between is served the cached copy.
+
+Each open stream holds one of the web worker's threads, so at most MAX_STREAMS
+run at once; clients past that are refused and poll /api/classify/progress.
+"""
+import os
+import threading
+import time
+
+import database as db
+import classifier
+
+POLL_SECONDS = float(os.environ.get("STREAM_POLL_SECONDS", "1.0"))
+# A comment line this often keeps proxies from closing a quiet stream and lets us notice gone clients
+KEEPALIVE_SECONDS = 15
+# Streams end after this long; EventSource reconnects on its own and the thread is recycled
+MAX_STREAM_SECONDS = 120
+# Streams open at once per process. The Procfile runs 16 gthread threads; this leaves the rest for requests
+MAX_STREAMS = int(os.environ.get("MAX_STREAMS", "4"))
+
+_cache = {}
+_cache_lock = threading.Lock()
+_week_locks = {}
+_stats = {"reads": 0, "served": 0, "streams": 0, "refused": 0}
+_stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+def _read(week_key):
+    progress = classifier.get_progress(week_key)
+    counts = db.get_week_status(week_key)
+    return {
+        "running": progress["running"], "status": progress["status"], "done": progress["done"],
+        "total": progress["total"], "current": progress["current"], "remaining": counts["unclassified"],
+        "events": counts["total"], "classified": counts["classified"], "sales": counts["sales"],
+    }
+
+def snapshot(week_key):
+    """The week's progress and counts, at most POLL_SECONDS old."""
+    with _cache_lock:
+        _stats["served"] += 1
+        entry = _cache.get(week_key)
+        if entry and time.monotonic() - entry[0] < POLL_SECONDS:
+            return entry[1]
+        week_lock = _week_locks.setdefault(week_key, threading.Lock())
+    # One reader per week refreshes; the others wait and take its result
+    with week_lock:
+        entry = _cache.get(week_key)
+        if entry and time.monotonic() - entry[0] < POLL_SECONDS:
+            return entry[1]
+        snap = _read(week_key)
+        with _cache_lock:
+            _cache[week_key] = (time.monotonic(), snap)
+            _stats["reads"] += 1
+        return snap
+
+def invalidate(week_key):
+    """Forget the cached snapshot, e.g. right after queueing a job for the week."""
+    with _cache_lock:
+        _cache.pop(week_key, None)
+
+def open_stream():
+    """Take a stream slot without waiting. False when MAX_STREAMS are already open."""
+    opened = _stream_slots.acquire(blocking=False)
+    with _cache_lock:
+        _stats["streams" if opened else "refused"] += 1
+    return opened
+
+def close_stream():
+    """Give back the slot of a stream that open_stream() admitted."""
+    with _cache_lock:
+        _stats["streams"] -= 1
+    _stream_slots.release()
+
+def stream(week_key):
+    """Yield the full snapshot, then only the fields that changed. Yields None as a keepalive."""
+    started = quiet_since = time.monotonic()
+    sent = None
+    while time.monotonic() - started < MAX_STREAM_SECONDS:
+        snap = snapshot(week_key)
+        delta = snap if sent is None else {k: v for k, v in snap.items() if sent.get(k) != v}
+        now = time.monotonic()
+        if delta:
+            sent, quiet_since = snap, now
+            yield delta
+        elif now - quiet_since >= KEEPALIVE_SECONDS:
+            quiet_since = now
+            yield None
+        time.sleep(POLL_SECONDS)
+
+def feed_stats():
+    with _cache_lock:
+        return {"weeks": len(_cache), **_stats}
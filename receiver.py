@@ -1,6 +1,7 @@
 """Local HTTP server to receive JSON data from browser."""
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import json, os
+import event_cache
 
 class Handler(BaseHTTPRequestHandler):
     def do_POST(self):
@@ -9,13 +10,10 @@ class Handler(BaseHTTPRequestHandler):
         
         # Extract week from path like /save/2026-W02
         week = self.path.split('/')[-1]
-        filepath = f"events_cache/{week}.json"
-        
-        with open(filepath, 'wb') as f:
-            f.write(data)
-        
         parsed = json.loads(data)
-        count = len(parsed.get('events', parsed) if isinstance(parsed, dict) else parsed)
+        entry = event_cache.write_week(week, parsed.get('events', parsed) if isinstance(parsed, dict) else parsed)
+        count = entry["count"]
+        filepath = f"events_cache/{week}.jsonl.gz"
         
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
@@ -1,6 +1,7 @@
 """Local relay: receives JSON from browser, saves to file. Fast response."""
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import json
+import event_cache
 
 class Handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self, *a):
@@ -15,8 +16,7 @@ class Handler(BaseHTTPRequestHandler):
         body = json.loads(self.rfile.read(length))
         wk = body['week']
         events = body['events']
-        with open(f'events_cache/{wk}.json', 'w') as f:
-            json.dump(events, f)
+        event_cache.write_week(wk, events)
         print(f'{wk}: saved {len(events)} events', flush=True)
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -0,0 +1,112 @@
+"""Content-Encoding support for the ingest endpoints.
+
+Clients may send `Content-Encoding: gzip` (or `zstd` when the zstandard
+package is installed) so a whole week fits in one small request. The body is
+decompressed as the route reads it, never all at once, and reading stops with
+413 once more than MAX_BODY_BYTES have come out of the decoder, so a small
+compressed bomb can't exhaust memory. A body that fails to decompress raises
+BodyDecodeError (400); the app renders it, like every error here, as JSON.
+
+    app.wsgi_app = DecompressMiddleware(app.wsgi_app, {"/api/sync", ...})
+"""
+import gzip
+import io
+import json
+import os
+import zlib
+
+from werkzeug.exceptions import BadRequest, LengthRequired, RequestEntityTooLarge
+from werkzeug.wsgi import LimitedStream
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Decompressed size cap; the compressed body is held to the same limit
+MAX_BODY_BYTES = int(os.environ.get("MAX_BODY_BYTES", str(64 * 1024 * 1024)))
+
+class BodyDecodeError(BadRequest):
+    """The compressed body is corrupt or truncated."""
+
+def supported_encodings():
+    return ["gzip", "zstd"] if zstandard else ["gzip"]
+
+class _DecodedStream(io.RawIOBase):
+    """The decoded body as a readable stream, capped at `limit` bytes."""
+
+    def __init__(self, decoder, limit):
+        self.decoder = decoder
+        self.limit = limit
+        self.total = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        try:
+            data = self.decoder.read(len(b))
+        except (OSError, EOFError, zlib.error) as e:
+            raise BodyDecodeError(f"could not decompress request body: {e}")
+        except Exception as e:
+            if zstandard and isinstance(e, zstandard.ZstdError):
+                raise BodyDecodeError(f"could not decompress request body: {e}")
+            raise
+        self.total += len(data)
+        if self.total > self.limit:
+            raise RequestEntityTooLarge(f"decompressed request body is over {self.limit:,} bytes")
+        b[:len(data)] = data
+        return len(data)
+
+def _compressed_input(environ, limit):
+    stream = environ["wsgi.input"]
+    length = environ.get("CONTENT_LENGTH")
+    if length:
+        if int(length) > limit:
+            raise RequestEntityTooLarge(f"request body is over {limit:,} bytes")
+        return LimitedStream(stream, int(length))
+    # Chunked upload: only safe to read to EOF when the server terminates the stream
+    if environ.get("wsgi.input_terminated"):
+        return stream
+    raise LengthRequired("compressed request body needs a Content-Length or chunked transfer encoding")
+
+def decoded_input(environ, encoding, limit=MAX_BODY_BYTES):
+    """A stream of the decompressed body for `encoding` ("gzip" or "zstd")."""
+    raw = _compressed_input(environ, limit)
+    if encoding in ("gzip", "x-gzip"):
+        decoder = gzip.GzipFile(fileobj=raw, mode="rb")
+    else:
+        decoder = zstandard.ZstdDecompressor().stream_reader(raw)
+    return io.BufferedReader(_DecodedStream(decoder, limit))
+
+class DecompressMiddleware:
+    """Swap wsgi.input for a decoding stream on compressed requests to `paths`."""
+
+    def __init__(self, wsgi_app, paths, limit=MAX_BODY_BYTES):
+        self.wsgi_app = wsgi_app
+        self.paths = set(paths)
+        self.limit = limit
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+        if not encoding or encoding == "identity" or environ.get("PATH_INFO") not in self.paths:
+            return self.wsgi_app(environ, start_response)
+        if encoding not in ("gzip", "x-gzip") and not (encoding == "zstd" and zstandard):
+            return _error(start_response, "415 Unsupported Media Type",
+                          f"unsupported Content-Encoding {encoding!r}; use {' or '.join(supported_encodings())}")
+        try:
+            stream = decoded_input(environ, encoding, self.limit)
+        except RequestEntityTooLarge as e:
+            return _error(start_response, "413 Request Entity Too Large", e.description)
+        except LengthRequired as e:
+            return _error(start_response, "411 Length Required", e.description)
+        environ["wsgi.input"] = stream
+        environ["wsgi.input_terminated"] = True
+        environ.pop("CONTENT_LENGTH", None)
+        del environ["HTTP_CONTENT_ENCODING"]
+        return self.wsgi_app(environ, start_response)
+
+def _error(start_response, status, message):
+    body = json.dumps({"error": message}).encode()
+    start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+    return [body]
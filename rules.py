@@ -0,0 +1,199 @@
+"""Deterministic fast-path classifier that runs before the LLM.
+
+Rules are tried in order and the first match wins:
+  1. manager overrides: exact normalized titles from the overrides table
+  2. "extra" rules from config.json
+  3. the built-in rules below, seeded from the categories in the system prompt
+
+Only events a rule is confident about are decided here; a title matched by
+both a sales and a not_sales rule, like everything no rule matches, goes to
+the model. Configure in config.json:
+
+    "rules": {
+        "enabled": true,
+        "disabled": ["travel"],
+        "extra": [{"name": "gym", "pattern": "\\\\bgym\\\\b", "classification": "not_sales", "confidence": 0.95}]
+    }
+
+RULES_ENABLED=0 turns the fast path off.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+from database import get_override_labels
+
+# Overrides are re-read at most this often (the app also invalidates on every new override)
+OVERRIDE_TTL = 60
+
+# (name, pattern, classification, confidence). A title that also matches a rule
+# with the other label ("Medicare review at the golf tournament") is left to the
+# model, so the patterns only need to be right about the titles they claim.
+DEFAULT_RULES = [
+    ("empty", r"^\W*$", "not_sales", 0.9),
+    ("team_meeting", r"\b(team|staff|office|agency|weekly|monthly) (meeting|huddle|call)\b|\bhuddle\b|\bstand-?up\b|\b1:1\b|\bone on one\b", "not_sales", 0.95),
+    ("training", r"\btraining\b|\bwebinar\b|\bce (class|course|credit)s?\b|\bcontinuing ed|\bcertification\b|\bahip\b|\bonboarding\b", "not_sales", 0.95),
+    ("church", r"\bchurch\b|\bbible study\b|\bworship\b|\bsunday service\b", "not_sales", 0.95),
+    ("sports", r"\b(golf|tennis|pickleball|softball|baseball|football|soccer|basketball) (game|practice|tournament|lesson)s?\b|^\W*(golf|tennis|pickleball)\W*$|\bgym\b|\bworkout\b", "not_sales", 0.9),
+    ("personal", r"\b(doctor|dentist|dr\.?) (appt|appointment)\b|\bhaircut\b|\bvacation\b|\bpto\b|\bday off\b|\bbirthday\b|\banniversary\b|\bdate night\b", "not_sales", 0.95),
+    ("family", r"\b(kids?|son|daughter|wife|husband|family|grandkids?)\b.*\b(pick ?up|drop ?off|recital|game|dinner|school)\b|\bschool pick ?up\b", "not_sales", 0.9),
+    ("errands", r"\berrands?\b|\bgrocer(y|ies)\b|\bcar (service|repair)\b|\boil change\b|\bpost office\b", "not_sales", 0.95),
+    ("travel", r"\btravel time\b|^\W*(travel|driving)\W*$|\bdrive (time|home)\b|\bflight\b|\bcommute\b", "not_sales", 0.9),
+    ("admin", r"\badmin\b|\bpaperwork\b|\bfollow[- ]?up calls? block\b|\bcrm\b|\bback office\b", "not_sales", 0.9),
+    ("prospecting", r"\bprospecting\b|\bcall(ing)? (block|session|time)\b|\bcold call|\bdial(ing|s)? (block|session)\b|\bpower hour\b|\blead calls?\b", "not_sales", 0.95),
+    ("door_knocking", r"\bdoor ?knock(ing)?\b|\bcanvass(ing)?\b", "not_sales", 0.95),
+    ("social", r"\bhappy hour\b|\b(office|team|birthday|retirement|pool) party\b|\bcelebration\b|\bchristmas\b|\bholiday\b|\bbbq\b|\bcookout\b", "not_sales", 0.85),
+    ("office_time", r"^\W*(office( time| hours| day)?|blocked?|busy|hold|do not (book|schedule)|dnb|out of office|ooo|lunch|break|personal)\W*$", "not_sales", 0.95),
+    ("sales_review", r"\b(medicare|policy|annuity|retirement|ltc|life insurance|coverage|plan) (review|consult(ation)?|appt|appointment)\b", "sales", 0.9),
+    ("sales_consult", r"\b(initial|new client|client|prospect) (consult(ation)?|meeting|appt|appointment)\b", "sales", 0.9),
+]
+
+# (title, expected label or None for "left to the model"), checked by `python rules.py check`.
+# The sales titles here were all once caught by a not_sales rule.
+RULE_CASES = [
+    ("Team Meeting", "not_sales"),
+    ("Sales call with Smith", None),
+    ("Golf outing w/ prospect", None),
+    ("Football league sponsorship pitch", None),
+    ("Drive to Acme Corp renewal review", None),
+    ("3rd party carrier quote", None),
+    ("Golf tournament", "not_sales"),
+    ("Golf", "not_sales"),
+    ("Drive home", "not_sales"),
+    ("Office party", "not_sales"),
+    ("Medicare review - Smith", "sales"),
+    ("Medicare review at the golf tournament", None),
+    ("Annuity team meeting", "not_sales"),
+]
+
+_stats = {}
+_stats_lock = threading.Lock()
+_state = {"rules": None, "overrides": None, "enabled": True, "loaded_at": 0.0}
+_state_lock = threading.Lock()
+
+def normalize_title(title):
+    """Case-folded, whitespace collapsed, edge punctuation stripped. Shared with the title cache."""
+    return " ".join((title or "").casefold().split()).strip(" .,:;-*!")
+
+def load_rules_config():
+    config_path = os.path.join(os.path.dirname(__file__), "config.json")
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            config = json.load(f).get("rules", {})
+    config["enabled"] = os.environ.get("RULES_ENABLED", "1" if config.get("enabled", True) else "0") == "1"
+    config.setdefault("disabled", [])
+    config.setdefault("extra", [])
+    return config
+
+def _compile(config):
+    disabled = set(config["disabled"])
+    rules = []
+    for r in config["extra"]:
+        try:
+            rules.append((r["name"], re.compile(r["pattern"], re.I), r["classification"], float(r.get("confidence", 0.9))))
+        except (KeyError, re.error) as e:
+            print(f"[rules] Skipping bad rule {r.get('name', r)}: {e}", flush=True)
+    for name, pattern, classification, confidence in DEFAULT_RULES:
+        if name not in disabled:
+            rules.append((name, re.compile(pattern, re.I), classification, confidence))
+    return [r for r in rules if r[2] in ("sales", "not_sales")]
+
+def _load():
+    """Compiled rules and override titles, refreshed when the override TTL lapses."""
+    with _state_lock:
+        now = time.monotonic()
+        if _state["rules"] is None:
+            config = load_rules_config()
+            _state["rules"] = _compile(config) if config["enabled"] else []
+            _state["enabled"] = config["enabled"]
+        if _state["overrides"] is None or now - _state["loaded_at"] > OVERRIDE_TTL:
+            _state["overrides"] = {normalize_title(t): c for t, c in get_override_labels()
+                                   if c in ("sales", "not_sales")} if _state["enabled"] else {}
+            _state["loaded_at"] = now
+        return _state["rules"], _state["overrides"]
+
+def invalidate():
+    """Drop compiled rules and overrides; call after a new override or a config change."""
+    with _state_lock:
+        _state["rules"] = None
+        _state["overrides"] = None
+
+def _match(title, rules, overrides):
+    key = normalize_title(title)
+    if key in overrides:
+        return "override", {"classification": overrides[key], "confidence": 1.0, "reasoning": "manager override"}
+    title = title or ""
+    found = None
+    for name, pattern, classification, confidence in rules:
+        if found and found[2] == classification:
+            continue
+        if pattern.search(title):
+            if found:
+                return None, None
+            found = (name, pattern, classification, confidence)
+    if not found:
+        return None, None
+    name, _, classification, confidence = found
+    return name, {"classification": classification, "confidence": confidence, "reasoning": f"rule: {name}"}
+
+def match(title):
+    """Return (rule_name, result) for the first rule that decides this title, else (None, None)."""
+    return _match(title, *_load())
+
+def apply_rules(events):
+    """Split events into (results decided by a rule, events left for the model)."""
+    rules, overrides = _load()
+    results, remaining = [], []
+    hits = {}
+    for e in events:
+        name, result = _match(e.get("title"), rules, overrides)
+        if result:
+            results.append({"id": e["id"], **result})
+            hits[name] = hits.get(name, 0) + 1
+        else:
+            remaining.append(e)
+    with _stats_lock:
+        for name, n in hits.items():
+            _stats[name] = _stats.get(name, 0) + n
+        _stats["_checked"] = _stats.get("_checked", 0) + len(events)
+    return results, remaining
+
+def rule_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    checked = stats.pop("_checked", 0)
+    decided = sum(stats.values())
+    rules, overrides = _load()
+    return {
+        "enabled": _state["enabled"],
+        "rules": len(rules),
+        "override_titles": len(overrides),
+        "checked": checked,
+        "decided": decided,
+        "hit_rate": round(decided / checked, 3) if checked else 0.0,
+        "hits": dict(sorted(stats.items(), key=lambda kv: -kv[1])),
+    }
+
+def check():
+    """Run RULE_CASES against the built-in rules (no config, no overrides). Returns the failures."""
+    rules = _compile({"disabled": [], "extra": []})
+    failures = []
+    for title, expected in RULE_CASES:
+        name, result = _match(title, rules, {})
+        got = result["classification"] if result else None
+        if got != expected:
+            failures.append((title, expected, got, name))
+    return failures
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] != ["check"]:
+        sys.exit("Usage: python rules.py check")
+    failures = check()
+    for title, expected, got, name in failures:
+        print(f"  {title!r}: expected {expected}, got {got} ({name})", flush=True)
+    print(f"{len(RULE_CASES) - len(failures)}/{len(RULE_CASES)} rule cases pass", flush=True)
+    sys.exit(1 if failures else 0)
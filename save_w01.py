@@ -1,9 +1,9 @@
 import json, sys
+import event_cache
 
 # Read from stdin
 data = json.load(sys.stdin)
 events = data if isinstance(data, list) else data.get('events', [])
 
-with open('events_cache/2026-W01.json', 'w') as f:
-    json.dump(events, f)
+event_cache.write_week('2026-W01', events)
 print(f"Saved {len(events)} events")
@@ -0,0 +1,65 @@
+"""Sync a range of weeks from the RawEvents sheet in one pass.
+
+    python sheet_sync.py 2026-W01 2026-W10 [--no-classify]
+
+The sheet is read and partitioned once (calendar_source.fetch_events_range),
+each week is written with one bulk upsert, and every touched week with
+pending events is queued for classification at the end.
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import database as db
+import calendar_source
+import classifier
+
+# Guard against a typo syncing years of weeks from one request
+MAX_SYNC_WEEKS = 104
+
+def sync_range(start_week, end_week, classify=True, queue=None):
+    """Upsert every week from start_week to end_week. Returns a summary dict.
+
+    queue(week_key) queues a week for classification; it defaults to
+    classifier.classify_events_async.
+    """
+    weeks = calendar_source.week_range(start_week, end_week)
+    if not weeks:
+        raise ValueError(f"{start_week} is after {end_week}")
+    if len(weeks) > MAX_SYNC_WEEKS:
+        raise ValueError(f"{len(weeks)} weeks requested; at most {MAX_SYNC_WEEKS} per sync")
+    t0 = time.perf_counter()
+    by_week = calendar_source.fetch_events_range(weeks[0], weeks[-1])
+    summary = {"start": weeks[0], "end": weeks[-1], "synced": 0, "inserted": 0, "updated": 0, "unchanged": 0,
+               "weeks": {}, "queued": []}
+    for wk, events in by_week.items():
+        if not events:
+            continue
+        upserted = db.upsert_events_bulk(events)
+        summary["weeks"][wk] = {"synced": len(events), **upserted}
+        summary["synced"] += len(events)
+        for key in ("inserted", "updated", "unchanged"):
+            summary[key] += upserted[key]
+    if classify:
+        queue = queue or classifier.classify_events_async
+        for wk in summary["weeks"]:
+            if db.count_pending(wk):
+                queue(wk)
+                summary["queued"].append(wk)
+    summary["seconds"] = round(time.perf_counter() - t0, 2)
+    print(f"[sync] Range {weeks[0]}..{weeks[-1]}: {summary['synced']} events in {len(summary['weeks'])} weeks "
+          f"({summary['inserted']} new, {summary['updated']} changed), queued {len(summary['queued'])} "
+          f"in {summary['seconds']}s", flush=True)
+    return summary
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        sys.exit("usage: python sheet_sync.py START_WEEK [END_WEEK] [--no-classify]")
+    result = sync_range(args[0], args[1] if len(args) > 1 else args[0], classify="--no-classify" not in sys.argv)
+    for wk, counts in result["weeks"].items():
+        print(f"  {wk}: {counts}", flush=True)
+    if result["queued"]:
+        print(f"Queued {len(result['queued'])} weeks; run `python classify_worker.py` if no worker is running", flush=True)
@@ -0,0 +1,200 @@
+"""Offline title classifier: hashed TF-IDF features + logistic regression in NumPy.
+
+Trained on the labels already in the events table (model answers, rule
+matches and manager overrides), saved to title_model.npz, and used by the
+classifier when classifier_mode is "local". Predictions below the confidence
+threshold are handed to OpenAI.
+
+    python title_model.py train [holdout_fraction]   # retrain and print a held-out report
+    python title_model.py predict "Medicare review - Smith"
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from database import get_labelled_titles
+from rules import normalize_title
+
+MODEL_PATH = os.environ.get("TITLE_MODEL_PATH", os.path.join(os.path.dirname(__file__), "title_model.npz"))
+N_FEATURES = 2 ** 18
+EPOCHS = 300
+LEARNING_RATE = 0.5
+L2 = 1e-5
+# Answers written by this model carry this reasoning prefix and are never trained on
+REASONING_PREFIX = "local model"
+
+_WORD = re.compile(r"[a-z0-9']+")
+_loaded = {"model": None, "mtime": None}
+_load_lock = threading.Lock()
+
+def _features(title):
+    """Hashed bucket ids for word unigrams, bigrams and character trigrams of a title."""
+    words = _WORD.findall(normalize_title(title))
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c:{padded[i:i+3]}" for i in range(len(padded) - 2)]
+    if not grams:
+        grams = ["empty"]
+    return [zlib.crc32(g.encode()) % N_FEATURES for g in grams]
+
+def _vectorize(titles, idf=None):
+    """Sparse rows as (row_ids, bucket_ids, values), l2-normalized TF-IDF. Returns (rows, idx, val, idf)."""
+    rows, idx = [], []
+    for r, title in enumerate(titles):
+        buckets = _features(title)
+        rows.extend([r] * len(buckets))
+        idx.extend(buckets)
+    rows = np.asarray(rows, dtype=np.int64)
+    idx = np.asarray(idx, dtype=np.int64)
+    # Collapse repeated buckets within a row into term counts
+    keys, counts = np.unique(rows * N_FEATURES + idx, return_counts=True)
+    rows, idx = keys // N_FEATURES, keys % N_FEATURES
+    if idf is None:
+        df = np.bincount(idx, minlength=N_FEATURES)
+        idf = np.log((1 + len(titles)) / (1 + df)) + 1.0
+    val = counts * idf[idx]
+    norms = np.sqrt(np.bincount(rows, weights=val ** 2, minlength=len(titles)))
+    val = val / norms[rows]
+    return rows, idx, val, idf
+
+def _margins(rows, idx, val, weights, bias, n):
+    return np.bincount(rows, weights=val * weights[idx], minlength=n) + bias
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+def fit(titles, labels, epochs=EPOCHS):
+    """Train on titles with 1 = sales, 0 = not_sales. Returns a model dict."""
+    y = np.asarray(labels, dtype=np.float64)
+    n = len(titles)
+    rows, idx, val, idf = _vectorize(titles)
+    weights = np.zeros(N_FEATURES)
+    bias = 0.0
+    # AdaGrad: rare buckets (names, odd words) still get a useful step size
+    g2_w = np.full(N_FEATURES, 1e-8)
+    g2_b = 1e-8
+    for _ in range(epochs):
+        err = _sigmoid(_margins(rows, idx, val, weights, bias, n)) - y
+        grad_w = np.bincount(idx, weights=val * err[rows], minlength=N_FEATURES) / n + L2 * weights
+        grad_b = err.mean()
+        g2_w += grad_w ** 2
+        g2_b += grad_b ** 2
+        weights -= LEARNING_RATE * grad_w / np.sqrt(g2_w)
+        bias -= LEARNING_RATE * grad_b / np.sqrt(g2_b)
+    return {"weights": weights, "bias": bias, "idf": idf}
+
+def predict_proba(model, titles):
+    """Probability of sales for each title."""
+    if not titles:
+        return np.zeros(0)
+    rows, idx, val, _ = _vectorize(titles, model["idf"])
+    return _sigmoid(_margins(rows, idx, val, model["weights"], model["bias"], len(titles)))
+
+def classify(model, events, threshold):
+    """Split events into (confident results, events to hand to the LLM)."""
+    probs = predict_proba(model, [e.get("title") or "" for e in events])
+    results, remaining = [], []
+    for e, p in zip(events, probs):
+        confidence = float(max(p, 1 - p))
+        if confidence >= threshold:
+            results.append({"id": e["id"], "classification": "sales" if p >= 0.5 else "not_sales",
+                            "confidence": round(confidence, 3), "reasoning": f"{REASONING_PREFIX} (p={p:.2f})"})
+        else:
+            remaining.append(e)
+    return results, remaining
+
+def save(model, meta, path=MODEL_PATH):
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, weights=model["weights"].astype(np.float32), idf=model["idf"].astype(np.float32),
+                        bias=np.array([model["bias"]]), meta=np.array(json.dumps(meta)))
+    os.replace(tmp, path)
+
+def load(path=MODEL_PATH):
+    """The saved model, reloaded when the file changes. None if it has not been trained yet."""
+    with _load_lock:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if _loaded["mtime"] != mtime:
+            with np.load(path) as data:
+                _loaded["model"] = {"weights": data["weights"].astype(np.float64), "idf": data["idf"].astype(np.float64),
+                                    "bias": float(data["bias"][0]), "meta": json.loads(str(data["meta"]))}
+            _loaded["mtime"] = mtime
+        return _loaded["model"]
+
+def model_info():
+    model = load()
+    return model["meta"] if model else {"trained": False}
+
+def training_examples():
+    """(title, label, source) from the events table. Overrides beat model labels; our own answers are skipped."""
+    examples = []
+    for row in get_labelled_titles():
+        if row["override"] in ("sales", "not_sales"):
+            examples.append((row["title"], row["override"], "override"))
+        elif row["classification"] in ("sales", "not_sales"):
+            reasoning = row["ai_reasoning"] or ""
+            if reasoning.startswith(REASONING_PREFIX):
+                continue
+            source = "rule" if reasoning.startswith(("rule:", "manager override")) else "llm"
+            examples.append((row["title"], row["classification"], source))
+    return examples
+
+def _is_holdout(title, fraction):
+    # Split by title, not by event, so repeats of one title never straddle train and test
+    return zlib.crc32(normalize_title(title).encode()) % 1000 < fraction * 1000
+
+def evaluate(model, examples, threshold):
+    probs = predict_proba(model, [t for t, _, _ in examples])
+    y = np.array([label == "sales" for _, label, _ in examples])
+    pred = probs >= 0.5
+    confident = np.maximum(probs, 1 - probs) >= threshold
+    report = {"events": len(examples), "accuracy": round(float((pred == y).mean()), 4) if len(y) else None,
+              "coverage": round(float(confident.mean()), 4) if len(y) else None,
+              "confident_accuracy": round(float((pred == y)[confident].mean()), 4) if confident.any() else None}
+    for source in ("llm", "override"):
+        mask = np.array([s == source for _, _, s in examples], dtype=bool)
+        report[f"{source}_accuracy"] = round(float((pred == y)[mask].mean()), 4) if mask.any() else None
+    return report
+
+def train(holdout=0.2, threshold=0.85, path=MODEL_PATH):
+    """Fit on the train split, report on the held-out titles, then refit on everything and save."""
+    examples = training_examples()
+    if not examples:
+        raise ValueError("no labelled events to train on")
+    train_set = [ex for ex in examples if not _is_holdout(ex[0], holdout)]
+    test_set = [ex for ex in examples if _is_holdout(ex[0], holdout)]
+    t0 = time.perf_counter()
+    model = fit([t for t, _, _ in train_set], [label == "sales" for _, label, _ in train_set])
+    report = evaluate(model, test_set, threshold) if test_set else {}
+    model = fit([t for t, _, _ in examples], [label == "sales" for _, label, _ in examples])
+    meta = {"trained": True, "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "examples": len(examples),
+            "train": len(train_set), "holdout": len(test_set), "threshold": threshold,
+            "train_seconds": round(time.perf_counter() - t0, 2), "holdout_report": report}
+    save(model, meta, path)
+    return meta
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "train"
+    if cmd == "train":
+        from classifier import load_config
+        fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+        meta = train(fraction, load_config()["local_model_threshold"])
+        print(json.dumps(meta, indent=2), flush=True)
+    elif cmd == "predict":
+        model = load()
+        if model is None:
+            sys.exit("No model yet: run `python title_model.py train`")
+        for title in sys.argv[2:]:
+            print(f"{predict_proba(model, [title])[0]:.3f}  {title}", flush=True)
+    else:
+        sys.exit("usage: python title_model.py [train [holdout_fraction] | predict TITLE...]")